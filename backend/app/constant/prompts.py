@@ -207,6 +207,25 @@ Guidelines:
 - If no tags are applicable, choose "Other".
 - Provide the tags as a JSON object with the key "tags" and an array of strings, without additional commentary."""
 
+SUMMARIZATION_METADATA_PROMPT = """You are an assistant that extracts metadata from a document summary. Return a JSON object with the keys "title", "year" and "tags".
+
+Title:
+- If the summary includes an explicit title or subject line, use it verbatim.
+- Otherwise, create a concise title in Title Case, max 10 words.
+- Exclude institutional identifiers (e.g., "Office of the...", "Republic of the Philippines", "Mindanao State University", "MSU", "MSU-IIT", "IIT", "Iligan Institute of Technology").
+
+Year:
+- The four-digit year representing publication or issuance.
+- If multiple years appear, select the one most relevant.
+
+Tags:
+- Select tags from the list below that are explicitly or implicitly supported by the content.
+- If no tags are applicable, choose "Other".
+- {formatted_tags}
+- Other
+
+Return only the JSON object without additional commentary."""
+
 TITLE_GENERATION_PROMPT = """
 You are **CATSight.TitleGen**, an extraction module that distills a conversation into one ultra-concise, descriptive title.
 
@@ -223,4 +242,19 @@ You are **CATSight.TitleGen**, an extraction module that distills a conversation
 </rules>
 
 Generate the title now.
-"""
\ No newline at end of file
+"""
+CONVERSATION_SUMMARY_PROMPT = """
+You are **CATSight.Memory**, a module that keeps a running summary of a long conversation between a user and MSU-IIT's AI assistant.
+
+<rules>
+• Merge the existing summary with the new messages into one updated summary
+• Keep facts the user stated, the questions asked, the answers given, and the documents that were cited (titles and ids)
+• Drop greetings, filler, and repeated information
+• Write in plain prose, at most 200 words
+• **Output:** Return **only** the updated summary
+</rules>
+
+<existing_summary>
+{summary}
+</existing_summary>
+"""
@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Entry points loaded by the web server, Celery workers and manage.py
+DEFAULT_MODULES = [
+    "app.urls",
+    "app.views.documents",
+    "app.views.async_documents",
+    "app.views.chats",
+    "app.tasks",
+    "app.services.catsight_agent",
+    "app.services.rag_agent",
+    "app.services.summarization_agent",
+    "app.services.vectorstore",
+]
+
+# Runs in a fresh interpreter so every module pays its full import cost
+MEASURE_SCRIPT = """
+import importlib, json, sys, time
+import django
+django.setup()
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure the import time of each app entry point and fail when one exceeds the budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help='Modules to check (defaults to the app entry points)')
+        parser.add_argument(
+            '--budget-ms',
+            type=int,
+            default=getattr(settings, 'IMPORT_TIME_BUDGET_MS', 1500),
+            help='Maximum import time per module in milliseconds',
+        )
+
+    def measure(self, module):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "inteldocs.settings")}
+        result = subprocess.run(
+            [sys.executable, "-c", MEASURE_SCRIPT, module],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"
+        return json.loads(result.stdout.strip().splitlines()[-1])["seconds"] * 1000, None
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or DEFAULT_MODULES
+        budget_ms = options['budget_ms']
+        over_budget = []
+
+        for module in modules:
+            elapsed_ms, error = self.measure(module)
+            if error:
+                over_budget.append(module)
+                self.stdout.write(self.style.ERROR(f"{module:<40} FAILED  {error}"))
+            elif elapsed_ms > budget_ms:
+                over_budget.append(module)
+                self.stdout.write(self.style.ERROR(f"{module:<40} {elapsed_ms:8.0f} ms  over budget"))
+            else:
+                self.stdout.write(f"{module:<40} {elapsed_ms:8.0f} ms")
+
+        if over_budget:
+            raise CommandError(f"{len(over_budget)} module(s) over the {budget_ms} ms import budget: {', '.join(over_budget)}")
+
+        self.stdout.write(self.style.SUCCESS(f"All modules import within {budget_ms} ms"))
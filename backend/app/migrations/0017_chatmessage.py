@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_remove_document_tags_document_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('message_id', models.CharField(max_length=255)),
+                ('role', models.CharField(max_length=20)),
+                ('message_type', models.CharField(default='message', max_length=20)),
+                ('content', models.TextField(blank=True, default='')),
+                ('tool_call', models.JSONField(blank=True, null=True)),
+                ('source_previews', models.JSONField(blank=True, null=True)),
+                ('sources', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='app.chat')),
+            ],
+            options={
+                'ordering': ['chat', 'sequence'],
+                'constraints': [models.UniqueConstraint(fields=('chat', 'sequence'), name='unique_chat_message_sequence'), models.UniqueConstraint(fields=('chat', 'message_id'), name='unique_chat_message_id')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_chatmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='year_extraction',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+CREATE_DOC_ID_INDEX_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_langchain_pg_embedding_doc_id "
+    "ON langchain_pg_embedding ((cmetadata->>'doc_id'))"
+)
+
+
+def create_doc_id_index(apps, schema_editor):
+    # PGVector creates langchain_pg_embedding when the vector store is first
+    # built, which also creates this index (see vectorstore.ensure_chunk_indexes).
+    # A DO block cannot wrap CREATE INDEX CONCURRENTLY, so the check runs here.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('langchain_pg_embedding')")
+        if cursor.fetchone()[0] is None:
+            return
+        cursor.execute(CREATE_DOC_ID_INDEX_SQL)
+
+
+def drop_doc_id_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_langchain_pg_embedding_doc_id")
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('app', '0018_document_year_extraction'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_doc_id_index, drop_doc_id_index),
+        # Left behind by the year metadata filter that filtered searches no longer use
+        migrations.RunSQL(
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_langchain_pg_embedding_year",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -94,6 +94,8 @@ class Document(models.Model):
     title              = models.TextField(null=True, blank=True)
     summary            = models.TextField(null=True, blank=True)
     year               = models.IntegerField(null=True, blank=True)
+    # How the year was decided (rule or LLM) and the rule's evidence, for auditing
+    year_extraction    = models.JSONField(null=True, blank=True)
     tags               = models.ManyToManyField(Tag, related_name='documents', blank=True)
     file               = models.CharField(max_length=1000, null=True, blank=True)
     file_name          = models.CharField(max_length=1000, null=True, blank=True)
@@ -211,3 +213,31 @@ class Chat(models.Model):
     def __str__(self):
         return f"{self.title or f'Chat {self.id}'} - {self.user.email}"
     
+
+class ChatMessage(models.Model):
+    """
+    Chat messages as shown to the user, written while the reply streams.
+    The LangGraph checkpoint stays the source of truth for the agent; this
+    table serves chat history.
+    """
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='messages')
+    sequence = models.PositiveIntegerField()
+    message_id = models.CharField(max_length=255)
+    role = models.CharField(max_length=20)
+    message_type = models.CharField(max_length=20, default='message')
+    content = models.TextField(blank=True, default='')
+    tool_call = models.JSONField(null=True, blank=True)
+    # Source cards for the history list; full sources (with passages) are loaded on demand
+    source_previews = models.JSONField(null=True, blank=True)
+    sources = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['chat', 'sequence']
+        constraints = [
+            models.UniqueConstraint(fields=['chat', 'sequence'], name='unique_chat_message_sequence'),
+            models.UniqueConstraint(fields=['chat', 'message_id'], name='unique_chat_message_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.chat_id}#{self.sequence} {self.role}: {self.content[:50]}"
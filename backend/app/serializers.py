@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import User, Document, DocumentStatusHistory, Chat, Tag
+from .constant import DocumentStatus
+from .services.summarization_progress import get_progress
 import json
 import logging
 from pathlib import Path
@@ -73,6 +75,7 @@ class DocumentSerializer(serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
     status_history = DocumentStatusHistorySerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    summarization_progress = serializers.SerializerMethodField()
     tag_ids = serializers.PrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True,
@@ -86,7 +89,13 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'summary', 'year', 'tags', 'tag_ids', 'file', 'file_name', 'file_type', 
                  'preview_image', 'blurhash', 'status', 'is_failed', 'task_id', 
                  'markdown_converter', 'summarization_model', 'no_of_chunks', 'created_at', 'updated_at', 
-                 'uploaded_by', 'status_history', 'page_count']
+                 'uploaded_by', 'status_history', 'page_count', 'summarization_progress']
+
+    def get_summarization_progress(self, obj):
+        """Live map-reduce counters while the summary is being generated."""
+        if obj.status != DocumentStatus.GENERATING_SUMMARY.value:
+            return None
+        return get_progress(obj.id)
         
     def to_representation(self, instance):
         """Convert the tags to a list of objects with id and name"""
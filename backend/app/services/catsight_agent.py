@@ -1,29 +1,36 @@
 from datetime import datetime
-import json
 from typing import Annotated, Optional, Any
 from typing_extensions import TypedDict
 from pydantic import BaseModel
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import StateGraph, START
 from langgraph.graph.message import AnyMessage, add_messages
 from langgraph.prebuilt import tools_condition, ToolNode
 from langgraph.checkpoint.postgres import PostgresSaver
-from psycopg_pool import ConnectionPool
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
 from langgraph.prebuilt import InjectedState, ToolNode
 from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, ToolMessage
-from langchain_core.tools import tool
-from ..services.ollama import base_url
-from langchain_ollama import ChatOllama
-from ..services.vectorstore import vector_store, DB_URI
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import tool, InjectedToolCallId
+from langgraph.config import get_stream_writer
+from ..services.ollama import get_runnable, get_reranker
+from ..services.vectorstore import get_vector_store, get_embeddings, DB_URI
+from ..services.retrieval_filters import RetrievalFilter, matches_nothing
+from ..services.context_expansion import expand_with_neighbors
+from ..services.chat_context import build_context, fold_conversation
+from ..services.context_packing import pack_sources
+from ..services.chat_messages import source_references
 from langchain_core.runnables import RunnableConfig
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from typing import Any, Dict
 from ..models import Document
 from ..services.postgres import get_psycopg_connection_string
-from langchain_classic.retrievers.contextual_compression import ContextualCompressionRetriever
-from langchain_classic.retrievers.document_compressors import LLMListwiseRerank
-from ..constant.prompts import CATSIGHT_PROMPT, TITLE_GENERATION_PROMPT
+from django.conf import settings
+from ..utils.lazy import lazy
+from ..constant.prompts import CATSIGHT_PROMPT
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +41,17 @@ CONNECTION_KWARGS = {
 
 PSYCOPG_DB_URI = get_psycopg_connection_string(DB_URI)
 
+def get_pool_kwargs() -> dict:
+    """Checkpointer pool sizing and timeouts (see CHECKPOINT_POOL_* settings)."""
+    return {
+        "min_size": settings.CHECKPOINT_POOL_MIN_SIZE,
+        "max_size": settings.CHECKPOINT_POOL_MAX_SIZE,
+        # Seconds a request waits for a free connection before PoolTimeout
+        "timeout": settings.CHECKPOINT_POOL_TIMEOUT,
+        "max_idle": settings.CHECKPOINT_POOL_MAX_IDLE,
+        "max_lifetime": settings.CHECKPOINT_POOL_MAX_LIFETIME,
+    }
+
 _connection_pool = None
 
 def get_connection_pool():
@@ -43,12 +61,58 @@ def get_connection_pool():
     if _connection_pool is None:
         _connection_pool = ConnectionPool(
             conninfo=PSYCOPG_DB_URI,
-            max_size=20,
             kwargs=CONNECTION_KWARGS,
+            **get_pool_kwargs(),
         )
         logger.info(f"Created PostgreSQL connection pool for LangGraph using: {PSYCOPG_DB_URI}")
     return _connection_pool
 
+_async_connection_pool = None
+
+async def get_async_connection_pool():
+    """Get or initialize the async connection pool (bound to the running event loop)"""
+    global _async_connection_pool
+
+    if _async_connection_pool is None:
+        pool = AsyncConnectionPool(
+            conninfo=PSYCOPG_DB_URI,
+            kwargs=CONNECTION_KWARGS,
+            open=False,
+            **get_pool_kwargs(),
+        )
+        await pool.open()
+        _async_connection_pool = pool
+        logger.info(f"Created async PostgreSQL connection pool for LangGraph using: {PSYCOPG_DB_URI}")
+    return _async_connection_pool
+
+def _describe_pool(pool) -> Optional[dict]:
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    requests = stats.get("requests_num", 0)
+    return {
+        "min_size": pool.min_size,
+        "max_size": pool.max_size,
+        "timeout": pool.timeout,
+        "pool_size": stats.get("pool_size", 0),
+        "pool_available": stats.get("pool_available", 0),
+        "requests_waiting": stats.get("requests_waiting", 0),
+        "requests_num": requests,
+        "requests_queued": stats.get("requests_queued", 0),
+        "requests_errors": stats.get("requests_errors", 0),
+        "requests_wait_ms": stats.get("requests_wait_ms", 0),
+        "avg_wait_ms": round(stats.get("requests_wait_ms", 0) / requests, 2) if requests else 0,
+        "connections_errors": stats.get("connections_errors", 0),
+    }
+
+def get_pool_stats() -> dict:
+    """Sizing and wait-time metrics of the sync and async checkpointer pools (None if not created)."""
+    return {
+        "sync": _describe_pool(_connection_pool),
+        "async": _describe_pool(_async_connection_pool),
+    }
+
 # --- Tool Error Handler -------------------------------------------------------
 def handle_tool_error(state) -> dict:
     error = state.get("error")
@@ -71,14 +135,12 @@ def create_tool_node_with_fallback(tools: list) -> dict:
 # --- State Definition -------------------------------------------------------
 class State(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
-    title: Optional[str]
-    should_generate_title: bool = True  
     file_ids: Optional[list[int]] = None
+    # Running summary of messages[:summary_cursor], which are no longer sent to the model
+    summary: Optional[str] = None
+    summary_cursor: Optional[int] = None
 
 # --- Helper Classes -------------------------------------------------------
-class Title(BaseModel):
-    title: str
-
 class IsRelevant(BaseModel):
     is_relevant: bool
 
@@ -88,27 +150,73 @@ class Assistant:
         self.prompt = prompt
         self.tools = tools
 
-
-    def __call__(self, state: State, config: RunnableConfig):
+    def get_runnable(self, config: RunnableConfig):
         configuration = config.get("configurable", {})
         model_key = configuration.get("model")
-        self.runnable = self.prompt | ChatOllama(model=model_key, base_url=base_url, temperature=1).bind_tools(self.tools)
+        return get_runnable(self.prompt, model_key, temperature=1, tools=self.tools)
+
+    @staticmethod
+    def get_context(state: State, config: RunnableConfig) -> State:
+        """State with the message history bounded to the model's token budget."""
+        messages = build_context(
+            state["messages"],
+            state.get("summary") or "",
+            state.get("summary_cursor") or 0,
+            config.get("configurable", {}).get("model"),
+        )
+        return {**state, "messages": messages}
+
+    @staticmethod
+    def is_empty_response(result) -> bool:
+        return not result.tool_calls and (
+            not result.content
+            or isinstance(result.content, list)
+            and not result.content[0].get("text")
+        )
+
+    def __call__(self, state: State, config: RunnableConfig):
+        runnable = self.get_runnable(config)
+        state = self.get_context(state, config)
 
         while True:
-            result = self.runnable.invoke(state)
+            result = runnable.invoke(state, config)
             # If the LLM happens to return an empty response, we will re-prompt it
             # for an actual response.
-            if not result.tool_calls and (
-                not result.content
-                or isinstance(result.content, list)
-                and not result.content[0].get("text")
-            ):
+            if self.is_empty_response(result):
+                messages = state["messages"] + [("user", "Respond with a real output.")]
+                state = {**state, "messages": messages}
+            else:
+                break
+        return {"messages": result}
+
+    async def acall(self, state: State, config: RunnableConfig):
+        runnable = self.get_runnable(config)
+        state = self.get_context(state, config)
+
+        while True:
+            result = await runnable.ainvoke(state, config)
+            if self.is_empty_response(result):
                 messages = state["messages"] + [("user", "Respond with a real output.")]
                 state = {**state, "messages": messages}
             else:
                 break
         return {"messages": result}
 
+# --- Context Management -------------------------------------------------------
+def manage_context(state: State, config: RunnableConfig):
+    """
+    Fold turns that no longer fit the model's token budget into the running
+    summary. Runs once per user turn, before the assistant.
+    """
+    summary = state.get("summary") or ""
+    cursor = state.get("summary_cursor") or 0
+    model = config.get("configurable", {}).get("model")
+
+    new_summary, new_cursor = fold_conversation(state["messages"], summary, cursor, model)
+    if new_cursor == cursor:
+        return {}
+    return {"summary": new_summary, "summary_cursor": new_cursor}
+
 # --- Prompt Constants -------------------------------------------------------
 # Create the ChatPromptTemplate for the assistant
 primary_assistant_prompt = ChatPromptTemplate.from_messages([
@@ -119,53 +227,33 @@ primary_assistant_prompt = ChatPromptTemplate.from_messages([
     ("placeholder", "{messages}"),
 ]).partial(today_date=datetime.now().strftime("%Y-%m-%d"))
 
-@tool(parse_docstring=True)
-def retrieve(query: str, config: RunnableConfig, state: Annotated[dict, InjectedState]) -> str:
-    """
-    This tool will retrieve documents from the vector store and filter them based on relevance to the query.
+# Candidates fetched per query before the merged rerank
+RETRIEVE_K = 4
+RELEVANCE_THRESHOLD = 0.3
 
-    Args:
-        query (str): The query to retrieve documents on.
-    """
-    file_ids = state.get("file_ids", [])
-    has_file_ids = len(file_ids) > 0
-
-    search_kwargs = {
-        "score_threshold": 0.3,
-    }
 
-    if has_file_ids:
-        search_kwargs["filter"] = {"doc_id": {"$in": file_ids}}
+def build_sources(docs) -> list:
+    """Group retrieved passages into source cards, one per document, in rank order."""
+    doc_ids = []
+    for doc in docs:
+        doc_id = doc.metadata.get("doc_id")
+        if doc_id is None:
+            logger.info(f"DOC ID IS NONE: {doc}")
+        elif doc_id not in doc_ids:
+            doc_ids.append(doc_id)
 
-    retriever = vector_store.as_retriever(
-        search_type="similarity_score_threshold",
-        search_kwargs=search_kwargs,
-    )
-    
-    model_id = config["configurable"].get("model")
-    llm = ChatOllama(model=model_id, base_url=base_url, temperature=0)
-    compressor = LLMListwiseRerank.from_llm(llm, top_n=10)
-    compression_retriever = ContextualCompressionRetriever(
-        base_compressor=compressor, base_retriever=retriever
-    )
+    documents = Document.objects.prefetch_related("tags").in_bulk(doc_ids)
 
-    docs = compression_retriever.invoke(query)
-           
     sources_map: Dict[Any, Dict[str, Any]] = {}
-    
     for doc in docs:
         doc_id = doc.metadata.get("doc_id")
         chunk_index = doc.metadata.get("index")
-        snippet = doc.page_content
-
         if doc_id is None:
-            logger.info(f"DOC ID IS NONE: {doc}")
             continue
 
         if doc_id not in sources_map:
-            try:
-                d = Document.objects.get(id=doc_id)
-            except Document.DoesNotExist:
+            d = documents.get(int(doc_id))
+            if d is None:
                 logger.info(f"DOCUMENT DOES NOT EXIST: {doc_id}")
                 continue
 
@@ -174,7 +262,7 @@ def retrieve(query: str, config: RunnableConfig, state: Annotated[dict, Injected
                 "title":         d.title,
                 "summary":       d.summary,
                 "year":          d.year,
-                "tags":          list(d.tags.values('name', 'description')),
+                "tags":          [{"name": t.name, "description": t.description} for t in d.tags.all()],
                 "file_name":     d.file_name,
                 "blurhash":      d.blurhash,
                 "preview_image": d.preview_image,
@@ -185,71 +273,152 @@ def retrieve(query: str, config: RunnableConfig, state: Annotated[dict, Injected
             }
 
         sources_map[doc_id]["contents"].append({
-            "snippet":     snippet,
-            "chunk_index": chunk_index,
+            "snippet":       doc.page_content,
+            "chunk_index":   chunk_index,
+            "chunk_indices": doc.metadata.get("chunk_indices", [chunk_index]),
         })
 
-    return json.dumps(list(sources_map.values()))
+    return list(sources_map.values())
+
 
-# --- Helper Functions ------------------------------------------------------
-def generate_title(state: State) -> dict:
+def retrieve_sources(queries: list[str], file_ids: list[int], model_id: str) -> tuple[str, list]:
     """
-    Generate a concise and descriptive 3-6 word title for a conversation between a user and MSU-IIT's AI assistant.
+    Retrieve evidence for one or more queries as a single retrieval: one batched
+    embedding request, the vector searches run concurrently, then one listwise
+    rerank over the deduplicated union of candidates.
+
+    Returns the packed passages for the model and the source cards for the client.
     """
+    vector_filter = RetrievalFilter.from_params(document_ids=file_ids or []).to_vector_filter()
+    if matches_nothing(vector_filter):
+        return pack_sources([]), []
 
-    # System prompt with title requirements - now using the constant from prompts.py
-    system_prompt = TITLE_GENERATION_PROMPT
+    vector_store = get_vector_store()
+    embeddings = get_embeddings().embed_documents(queries)
+    relevance = vector_store._select_relevance_score_fn()
 
-    # Combine conversation messages into a single string
-    conversation_text = "\n".join([m.content for m in state["messages"] if isinstance(m, HumanMessage)])
+    def search(embedding):
+        return vector_store.similarity_search_with_score_by_vector(
+            embedding, k=RETRIEVE_K, filter=vector_filter or None
+        )
 
-    # Create the prompt template
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("human", "{text}")
-    ])
+    if len(embeddings) == 1:
+        results = [search(embeddings[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(embeddings)) as executor:
+            results = list(executor.map(search, embeddings))
+
+    # Union of candidates, keeping each chunk once with its best score
+    candidates: Dict[Any, tuple] = {}
+    for hits in results:
+        for doc, distance in hits:
+            score = relevance(distance)
+            if score < RELEVANCE_THRESHOLD:
+                continue
+            key = doc.metadata.get("id") or (doc.metadata.get("doc_id"), doc.metadata.get("index"))
+            if key not in candidates or score > candidates[key][1]:
+                candidates[key] = (doc, score)
 
-    # Bind the prompt with the chat model and structured output
-    runnable = prompt | ChatOllama(model="llama3.2:1b", base_url=base_url, temperature=0).with_structured_output(schema=Title)
+    docs = [doc for doc, _ in sorted(candidates.values(), key=lambda item: item[1], reverse=True)]
+    if docs:
+        docs = list(get_reranker(model_id, top_n=10).compress_documents(docs, "\n".join(queries)))
 
-    # Invoke the model with the conversation text
-    ai_msg = runnable.invoke({"text": conversation_text})
+    docs = expand_with_neighbors(docs)
+    sources = build_sources(docs)
+    logger.info(f"Retrieved {len(sources)} sources for {len(queries)} queries from {len(candidates)} candidates")
 
-    # Extract the title from the structured response
-    title = ai_msg.title.strip()
+    # The model gets compact numbered passages; the source cards are for the client
+    return pack_sources(sources), sources
 
-    # Log the generated title
-    logger.info(f"Generated title: {title}")
 
-    return {
-        "title": title,
-        "should_generate_title": False
-    }
+def emit_sources(tool_call_id: str, sources: list) -> list:
+    """
+    Send the full source cards of a retrieve call on the "custom" stream, where
+    the chat view stores them on ChatMessage, and return the references the
+    ToolMessage artifact keeps. The artifact is checkpointed with every step,
+    so it stays small; it is never sent to the model either way.
+    """
+    get_stream_writer()({"tool_sources": {"tool_call_id": tool_call_id, "sources": sources}})
+    return source_references(sources)
 
-def generate_title_condition(state: State):
-    """Determine if the assistant should generate a title."""
-    messages = state["messages"]
-    should_generate_title = state.get("should_generate_title", True)
-    
-    if len(messages) > 3 and should_generate_title:
-        return "generate_title"
-    
-    return END
 
-# --- Agent Implementation -------------------------------------------
-def create_catsight_agent():
+@tool(parse_docstring=True, response_format="content_and_artifact")
+def retrieve(
+    query: str,
+    config: RunnableConfig,
+    state: Annotated[dict, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> tuple[str, list]:
     """
-    Create a LangGraph agent for the MSU-IIT chatbot with persistence.
-    
-    Returns:
-        Compiled LangGraph agent with persistence
+    This tool will retrieve documents from the vector store and filter them based on relevance to the query.
+
+    Args:
+        query (str): The query to retrieve documents on.
+    """
+    content, sources = retrieve_sources([query], state.get("file_ids"), config["configurable"].get("model"))
+    return content, emit_sources(tool_call_id, sources)
+
+
+class ToolsNode:
+    """
+    Runs the assistant's tool calls. Several retrieve calls in one message are
+    answered by a single merged retrieval; anything else goes to the ToolNode.
     """
-    # Initialize the pool and checkpointer
-    pool = get_connection_pool()
-    checkpointer = PostgresSaver(pool)
-    checkpointer.setup()
-    logger.info("PostgreSQL checkpointer setup completed")
 
+    def __init__(self, tools: list):
+        self.tool_node = create_tool_node_with_fallback(tools)
+
+    @staticmethod
+    def batched_retrieve_calls(state: State):
+        tool_calls = state["messages"][-1].tool_calls
+        if len(tool_calls) > 1 and all(tc["name"] == retrieve.name for tc in tool_calls):
+            return tool_calls
+        return None
+
+    @staticmethod
+    def merged_messages(tool_calls, content: str, sources: list) -> list:
+        # The merged result answers the last call, which is the one the chat UI
+        # reads sources from; the earlier calls point to it
+        messages = [
+            ToolMessage(
+                content="Results for this query are merged into the last retrieve result.",
+                artifact=[],
+                tool_call_id=tc["id"],
+                name=tc["name"],
+            )
+            for tc in tool_calls[:-1]
+        ]
+        references = emit_sources(tool_calls[-1]["id"], sources)
+        messages.append(ToolMessage(content=content, artifact=references, tool_call_id=tool_calls[-1]["id"], name=tool_calls[-1]["name"]))
+        return messages
+
+    def run_batched(self, state: State, config: RunnableConfig, tool_calls) -> dict:
+        queries = [tc["args"].get("query", "") for tc in tool_calls]
+        try:
+            content, sources = retrieve_sources(queries, state.get("file_ids"), config["configurable"].get("model"))
+        except Exception as e:
+            logger.error(f"Error in batched retrieve: {str(e)}", exc_info=True)
+            return handle_tool_error({**state, "error": e})
+        return {"messages": self.merged_messages(tool_calls, content, sources)}
+
+    def __call__(self, state: State, config: RunnableConfig):
+        tool_calls = self.batched_retrieve_calls(state)
+        if tool_calls is None:
+            return self.tool_node.invoke(state, config)
+        return self.run_batched(state, config, tool_calls)
+
+    async def acall(self, state: State, config: RunnableConfig):
+        tool_calls = self.batched_retrieve_calls(state)
+        if tool_calls is None:
+            return await self.tool_node.ainvoke(state, config)
+        return await asyncio.to_thread(self.run_batched, state, config, tool_calls)
+
+# --- Agent Implementation -------------------------------------------
+def build_catsight_graph(checkpointer):
+    """
+    Build and compile the chatbot graph on top of the given checkpointer.
+    The assistant node supports both invoke/stream and ainvoke/astream.
+    """
     # Define the tools
     tools = [retrieve]
 
@@ -257,35 +426,69 @@ def create_catsight_agent():
     builder = StateGraph(State)
     
     # Define nodes
-    builder.add_node("assistant", Assistant(primary_assistant_prompt, tools))
-    builder.add_node("tools", create_tool_node_with_fallback(tools))
-    builder.add_node("generate_title", generate_title)
+    assistant = Assistant(primary_assistant_prompt, tools)
+    builder.add_node("manage_context", manage_context)
+    builder.add_node("assistant", RunnableLambda(assistant, afunc=assistant.acall))
+    tools_node = ToolsNode(tools)
+    builder.add_node("tools", RunnableLambda(tools_node, afunc=tools_node.acall))
     
     # Define edges
-    builder.add_edge(START, "assistant")
+    builder.add_edge(START, "manage_context")
+    builder.add_edge("manage_context", "assistant")
     
     builder.add_conditional_edges(
         "assistant",
         tools_condition,
     )
     builder.add_edge("tools", "assistant")
-    
-    # Add conditional edge for title generation
-    builder.add_conditional_edges(
-        "assistant",
-        generate_title_condition,
-        {
-            "generate_title": "generate_title",
-            END: END
-        }
-    )
-    
-    builder.add_edge("generate_title", END)
+
+    # Chat titles are generated by generate_chat_title_task after the reply is delivered
     
     # Compile with checkpointer and return the graph
     graph = builder.compile(checkpointer=checkpointer)
     
     return graph
 
-# Create the agent instance
-catsight_agent = create_catsight_agent()
\ No newline at end of file
+def create_catsight_agent():
+    """
+    Create a LangGraph agent for the MSU-IIT chatbot with persistence.
+    
+    Returns:
+        Compiled LangGraph agent with persistence
+    """
+    # Initialize the pool and checkpointer
+    pool = get_connection_pool()
+    checkpointer = PostgresSaver(pool)
+    checkpointer.setup()
+    logger.info("PostgreSQL checkpointer setup completed")
+
+    return build_catsight_graph(checkpointer)
+
+_async_catsight_agent = None
+_async_agent_lock = None
+
+async def get_async_catsight_agent():
+    """
+    Get or create the agent backed by an AsyncPostgresSaver, for use with
+    ainvoke/astream from async views running under ASGI.
+    """
+    global _async_catsight_agent, _async_agent_lock
+
+    if _async_catsight_agent is not None:
+        return _async_catsight_agent
+
+    if _async_agent_lock is None:
+        _async_agent_lock = asyncio.Lock()
+
+    async with _async_agent_lock:
+        if _async_catsight_agent is None:
+            pool = await get_async_connection_pool()
+            checkpointer = AsyncPostgresSaver(pool)
+            await checkpointer.setup()
+            logger.info("Async PostgreSQL checkpointer setup completed")
+            _async_catsight_agent = build_catsight_graph(checkpointer)
+
+    return _async_catsight_agent
+
+# The agent (pool, checkpointer DDL, graph) is created on first use
+get_catsight_agent = lazy(create_catsight_agent)
\ No newline at end of file
@@ -0,0 +1,194 @@
+import json
+import logging
+from typing import List, Optional, Tuple
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+    get_buffer_string,
+)
+from langchain_core.prompts import ChatPromptTemplate
+from ..services.ollama import get_runnable, get_model_context_tokens
+from ..constant.prompts import CONVERSATION_SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Tokens kept free for the system prompt and the model's reply
+RESERVED_TOKENS = 2048
+
+# Number of most recent user turns that are always kept verbatim
+KEEP_RECENT_TURNS = 2
+
+SUMMARY_MODEL = "llama3.2:1b"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for budgeting."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: AnyMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tokens = estimate_tokens(content)
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(json.dumps(tool_call.get("args", {})))
+    return tokens
+
+
+def get_context_budget(model: Optional[str]) -> int:
+    """Tokens available for the conversation history for the given model."""
+    context = get_model_context_tokens(model)
+    return max(context - RESERVED_TOKENS, context // 4)
+
+
+def compact_tool_message(message: ToolMessage) -> ToolMessage:
+    """
+    Replace a retrieve result with a short reference listing the documents it
+    returned.
+    """
+    sources = getattr(message, "artifact", None)
+    if not isinstance(sources, list):
+        # Older results carried the sources as JSON content
+        try:
+            sources = json.loads(message.content)
+        except (TypeError, ValueError):
+            sources = None
+
+    if isinstance(sources, list):
+        references = [
+            f"{source.get('title') or source.get('file_name')} (id {source.get('id')}, year {source.get('year')})"
+            for source in sources
+            if isinstance(source, dict)
+        ]
+        if references:
+            content = "Earlier retrieval (passages omitted) returned: " + "; ".join(references)
+        else:
+            content = "Earlier retrieval returned no documents."
+    else:
+        content = message.content if isinstance(message.content, str) else ""
+        if estimate_tokens(content) > 100:
+            content = content[:400] + " ... (truncated)"
+
+    return ToolMessage(
+        content=content,
+        tool_call_id=message.tool_call_id,
+        id=message.id,
+        name=getattr(message, "name", None),
+        artifact=getattr(message, "artifact", None),
+    )
+
+
+def _last_turn_start(messages: List[AnyMessage]) -> int:
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return index
+    return 0
+
+
+def compact_old_tool_results(messages: List[AnyMessage]) -> List[AnyMessage]:
+    """Tool results from earlier turns become references; the current turn keeps its passages."""
+    current_turn = _last_turn_start(messages)
+    return [
+        compact_tool_message(message) if isinstance(message, ToolMessage) and index < current_turn else message
+        for index, message in enumerate(messages)
+    ]
+
+
+def count_tokens(messages: List[AnyMessage]) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+
+def turn_starts(messages: List[AnyMessage]) -> List[int]:
+    """Indexes of the HumanMessages that open each turn."""
+    return [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+
+def plan_fold(messages: List[AnyMessage], summary: str, budget: int) -> int:
+    """
+    Return how many leading messages should be folded into the summary so that
+    the rest fits the budget. Cuts only at turn boundaries (so tool calls stay
+    paired with their results) and never touches the last KEEP_RECENT_TURNS turns.
+    """
+    compacted = compact_old_tool_results(messages)
+    if count_tokens(compacted) + estimate_tokens(summary) <= budget:
+        return 0
+
+    starts = turn_starts(messages)
+    if len(starts) <= KEEP_RECENT_TURNS:
+        return 0
+
+    # Summary headroom, so the cut leaves room for a grown summary
+    remaining = budget - estimate_tokens(summary) - 300
+    candidates = starts[1:len(starts) - KEEP_RECENT_TURNS + 1]
+    for cut in candidates:
+        if count_tokens(compacted[cut:]) <= remaining:
+            return cut
+    return candidates[-1]
+
+
+summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", CONVERSATION_SUMMARY_PROMPT),
+    ("human", "{text}"),
+])
+
+
+def summarize_messages(summary: str, messages: List[AnyMessage]) -> str:
+    """Fold messages into the running summary with a small model."""
+    runnable = get_runnable(summary_prompt, SUMMARY_MODEL, temperature=0)
+
+    text = get_buffer_string([
+        compact_tool_message(message) if isinstance(message, ToolMessage) else message
+        for message in messages
+    ])
+    result = runnable.invoke({"summary": summary or "(none)", "text": text})
+    return result.content.strip()
+
+
+def fold_conversation(messages: List[AnyMessage], summary: str, cursor: int, model: Optional[str]) -> Tuple[str, int]:
+    """
+    Fold turns that no longer fit the model's budget into the running summary.
+
+    Returns the (possibly unchanged) summary and the index of the first message
+    that is still sent verbatim.
+    """
+    live = messages[cursor:]
+    fold = plan_fold(live, summary, get_context_budget(model))
+    if not fold:
+        return summary, cursor
+
+    try:
+        new_summary = summarize_messages(summary, live[:fold])
+    except Exception as e:
+        logger.error(f"Error summarizing conversation, keeping full history: {str(e)}")
+        return summary, cursor
+
+    logger.info(f"Folded {fold} messages into the conversation summary (cursor {cursor} -> {cursor + fold})")
+    return new_summary, cursor + fold
+
+
+def build_context(messages: List[AnyMessage], summary: str, cursor: int, model: Optional[str]) -> List[AnyMessage]:
+    """
+    Messages to send to the model: the running summary, then the unsummarized
+    messages with old tool results compacted. Whole turns are dropped from the
+    front if the summary could not keep up with the budget.
+    """
+    live = compact_old_tool_results(messages[cursor:])
+    budget = get_context_budget(model) - estimate_tokens(summary or "")
+    if count_tokens(live) <= budget:
+        return _with_summary(live, summary)
+
+    # Keep the current turn even if it alone exceeds the budget
+    for start in turn_starts(live)[1:]:
+        if count_tokens(live[start:]) <= budget or start == _last_turn_start(live):
+            logger.warning(f"Conversation over budget ({budget} tokens), dropped {start} oldest messages")
+            live = live[start:]
+            break
+
+    return _with_summary(live, summary)
+
+
+def _with_summary(messages: List[AnyMessage], summary: str) -> List[AnyMessage]:
+    if summary:
+        return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] + messages
+    return messages
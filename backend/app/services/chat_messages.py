@@ -0,0 +1,190 @@
+import logging
+from typing import List, Optional, Tuple
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from langchain_core.messages import ToolMessage
+from ..models import Chat, ChatMessage, Document
+from ..utils.langgraph import serialize_message
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+
+# Source fields shown in the history list; the passages ("contents") are loaded on demand
+SOURCE_PREVIEW_FIELDS = (
+    "id", "title", "summary", "year", "tags", "file_name", "blurhash",
+    "preview_image", "file_type", "created_at", "updated_at",
+)
+
+
+def source_previews(sources: list) -> list:
+    return [
+        {field: source.get(field) for field in SOURCE_PREVIEW_FIELDS}
+        for source in sources
+        if isinstance(source, dict)
+    ]
+
+
+def source_references(sources: list) -> list:
+    """
+    What a retrieve ToolMessage keeps of its source cards as the artifact:
+    the document and its chunk indices, plus the title and year the context
+    compaction cites. The full cards are stored on ChatMessage.
+    """
+    return [
+        {
+            "id": source.get("id"),
+            "title": source.get("title"),
+            "year": source.get("year"),
+            "chunks": [content.get("chunk_indices") for content in source.get("contents", [])],
+        }
+        for source in sources
+        if isinstance(source, dict)
+    ]
+
+
+def is_source_references(artifact) -> bool:
+    return isinstance(artifact, list) and all(
+        isinstance(item, dict) and "contents" not in item for item in artifact
+    )
+
+
+def hydrate_sources(references: list) -> list:
+    """Source cards rebuilt from artifact references, without the passages."""
+    documents = Document.objects.prefetch_related("tags").in_bulk(
+        [reference["id"] for reference in references if reference.get("id") is not None]
+    )
+    sources = []
+    for reference in references:
+        document = documents.get(reference.get("id"))
+        if document is None:
+            continue
+        sources.append({
+            "id": document.id,
+            "title": document.title,
+            "summary": document.summary,
+            "year": document.year,
+            "tags": [{"name": t.name, "description": t.description} for t in document.tags.all()],
+            "file_name": document.file_name,
+            "blurhash": document.blurhash,
+            "preview_image": document.preview_image,
+            "file_type": document.file_type,
+            "created_at": document.created_at.isoformat(),
+            "updated_at": document.updated_at.isoformat(),
+            "contents": [],
+        })
+    return sources
+
+
+class MessageRecorder:
+    """
+    Writes a chat's LangGraph messages to ChatMessage as they stream.
+
+    Messages already stored are skipped by id, so the recorder can be fed the
+    whole message list of every "values" chunk. The full source cards of
+    retrieve results are handed over with add_sources as the tools emit them.
+    """
+
+    def __init__(self, chat: Chat):
+        self.chat = chat
+        stored = ChatMessage.objects.filter(chat=chat)
+        self.known_ids = set(stored.values_list("message_id", flat=True))
+        self.next_sequence = (stored.aggregate(last=Max("sequence"))["last"] or 0) + 1
+        self.sources_by_call = {}
+
+    def add_sources(self, tool_call_id: str, sources: list) -> None:
+        self.sources_by_call[tool_call_id] = sources
+
+    def sources_for(self, message) -> Optional[list]:
+        """
+        Full source cards of a retrieve result: the ones emitted during this run,
+        else rebuilt from the artifact's references. None for other messages
+        and for results checkpointed with the full cards.
+        """
+        if not isinstance(message, ToolMessage):
+            return None
+        if message.tool_call_id in self.sources_by_call:
+            return self.sources_by_call[message.tool_call_id]
+        artifact = getattr(message, "artifact", None)
+        if artifact and is_source_references(artifact):
+            logger.warning(f"No streamed sources for tool call {message.tool_call_id}, rebuilding them without passages")
+            return hydrate_sources(artifact)
+        return None
+
+    def record(self, messages: list) -> int:
+        """Store messages not seen before. Returns how many were written."""
+        rows = []
+        for message in messages:
+            if not message.id or message.id in self.known_ids:
+                continue
+            rows.append(self._to_row(message, self.next_sequence + len(rows)))
+
+        if not rows:
+            return 0
+
+        try:
+            with transaction.atomic():
+                ChatMessage.objects.bulk_create(rows)
+        except IntegrityError as e:
+            # Another request wrote to this chat concurrently; it owns these sequences
+            logger.warning(f"Could not record messages for chat {self.chat.id}: {str(e)}")
+            return 0
+
+        self.known_ids.update(row.message_id for row in rows)
+        self.next_sequence += len(rows)
+        return len(rows)
+
+    def _to_row(self, message, sequence: int) -> ChatMessage:
+        data = serialize_message(message, sources=self.sources_for(message))
+        content = data["content"] if isinstance(data["content"], str) else ""
+        sources = (data["tool_result"] or {}).get("sources")
+        return ChatMessage(
+            chat=self.chat,
+            sequence=sequence,
+            message_id=data["id"],
+            role=data["role"],
+            message_type=data["message_type"],
+            content=content,
+            tool_call=data["tool_call"],
+            source_previews=source_previews(sources) if sources is not None else None,
+            sources=sources,
+        )
+
+
+def message_to_dict(row: ChatMessage) -> dict:
+    """Format a stored message like serialize_message, with source previews instead of full sources."""
+    return {
+        "id": row.message_id,
+        "sequence": row.sequence,
+        "role": row.role,
+        "content": row.content,
+        "timestamp": row.created_at.isoformat(),
+        "message_type": row.message_type,
+        "tool_call": row.tool_call,
+        "tool_result": {"sources": row.source_previews, "lazy": True} if row.source_previews is not None else None,
+    }
+
+
+def get_history_page(chat: Chat, before: Optional[int] = None, limit: int = HISTORY_PAGE_SIZE) -> Tuple[List[dict], Optional[int]]:
+    """
+    Return up to `limit` messages older than sequence `before` (the latest
+    messages when not given), oldest first, and the cursor for the next
+    older page (None when there is none).
+    """
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    rows = ChatMessage.objects.filter(chat=chat).defer("sources")
+    if before is not None:
+        rows = rows.filter(sequence__lt=before)
+
+    page = list(rows.order_by("-sequence")[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    page.reverse()
+
+    next_cursor = page[0].sequence if has_more and page else None
+    return [message_to_dict(row) for row in page], next_cursor
+
+
+def has_messages(chat: Chat) -> bool:
+    return ChatMessage.objects.filter(chat=chat).exists()
@@ -0,0 +1,41 @@
+import logging
+from pydantic import BaseModel
+from langchain_core.prompts import ChatPromptTemplate
+from ..services.ollama import get_runnable
+from ..constant.prompts import TITLE_GENERATION_PROMPT
+
+logger = logging.getLogger(__name__)
+
+TITLE_MODEL = "llama3.2:1b"
+
+# Titles are generated once a chat has more than this many messages
+TITLE_MIN_MESSAGES = 3
+
+UNTITLED = "Untitled"
+
+
+class Title(BaseModel):
+    title: str
+
+
+def needs_title(title) -> bool:
+    return not title or title == UNTITLED
+
+
+title_prompt = ChatPromptTemplate.from_messages([
+    ("system", TITLE_GENERATION_PROMPT),
+    ("human", "{text}")
+])
+
+
+def generate_chat_title(conversation_text: str) -> str:
+    """
+    Generate a concise and descriptive 3-6 word title for a conversation between a user and MSU-IIT's AI assistant.
+    """
+    runnable = get_runnable(title_prompt, TITLE_MODEL, temperature=0, schema=Title)
+
+    ai_msg = runnable.invoke({"text": conversation_text})
+    title = ai_msg.title.strip()
+
+    logger.info(f"Generated title: {title}")
+    return title
@@ -0,0 +1,144 @@
+import logging
+from typing import Dict
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Tables created by langgraph's PostgresSaver.setup()
+CHECKPOINT_TABLES = ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+
+# Only the newest checkpoint of each thread is needed to resume a chat. Threads
+# with a checkpoint younger than the grace period may still be running and are
+# left alone, so the agent never sees a half-pruned thread.
+IDLE_THREADS_SQL = """
+    CREATE TEMP TABLE idle_threads ON COMMIT DROP AS
+    SELECT thread_id, checkpoint_ns, max(checkpoint_id) AS latest_id
+    FROM checkpoints
+    GROUP BY thread_id, checkpoint_ns
+    HAVING max((checkpoint->>'ts')::timestamptz) < now() - make_interval(mins => %s)
+"""
+
+PRUNE_CHECKPOINTS_SQL = """
+    DELETE FROM checkpoints c
+    USING idle_threads i
+    WHERE c.thread_id = i.thread_id
+      AND c.checkpoint_ns = i.checkpoint_ns
+      AND c.checkpoint_id < i.latest_id
+"""
+
+PRUNE_WRITES_SQL = """
+    DELETE FROM checkpoint_writes w
+    USING idle_threads i
+    WHERE w.thread_id = i.thread_id
+      AND w.checkpoint_ns = i.checkpoint_ns
+      AND w.checkpoint_id < i.latest_id
+"""
+
+# A blob is live while the newest checkpoint references its channel version
+PRUNE_BLOBS_SQL = """
+    DELETE FROM checkpoint_blobs b
+    USING idle_threads i
+    WHERE b.thread_id = i.thread_id
+      AND b.checkpoint_ns = i.checkpoint_ns
+      AND NOT EXISTS (
+          SELECT 1 FROM checkpoints c
+          WHERE c.thread_id = i.thread_id
+            AND c.checkpoint_ns = i.checkpoint_ns
+            AND c.checkpoint_id = i.latest_id
+            AND c.checkpoint->'channel_versions'->>b.channel = b.version
+      )
+"""
+
+# Chat threads are named "thread_<chat id>"
+DELETE_ORPHAN_THREADS_SQL = """
+    DELETE FROM {table} t
+    WHERE t.thread_id LIKE %s
+      AND NOT EXISTS (
+          SELECT 1 FROM app_chat ch WHERE 'thread_' || ch.id = t.thread_id
+      )
+"""
+
+TABLE_SIZES_SQL = """
+    SELECT relname, pg_total_relation_size(oid)
+    FROM pg_class
+    WHERE relname = ANY(%s) AND relkind = 'r'
+"""
+
+
+def get_retention_grace_minutes() -> int:
+    return int(getattr(settings, "CHECKPOINT_RETENTION_GRACE_MINUTES", 30))
+
+
+def checkpoint_tables_exist() -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('checkpoints')")
+        return cursor.fetchone()[0] is not None
+
+
+def get_checkpoint_table_sizes() -> Dict[str, int]:
+    """Total on-disk size in bytes (including indexes and TOAST) of each checkpoint table."""
+    with connection.cursor() as cursor:
+        cursor.execute(TABLE_SIZES_SQL, [list(CHECKPOINT_TABLES)])
+        return {name: size for name, size in cursor.fetchall()}
+
+
+def delete_thread_checkpoints(thread_id: str) -> int:
+    """Remove every checkpoint row of a thread, e.g. when its chat is deleted."""
+    if not checkpoint_tables_exist():
+        return 0
+
+    deleted = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in CHECKPOINT_TABLES:
+            cursor.execute(f"DELETE FROM {table} WHERE thread_id = %s", [thread_id])
+            deleted += cursor.rowcount
+    logger.info(f"Deleted {deleted} checkpoint rows for {thread_id}")
+    return deleted
+
+
+def compact_checkpoints() -> dict:
+    """
+    Apply the checkpoint retention policy:
+
+    - drop every thread whose chat no longer exists
+    - keep only the newest checkpoint of each idle thread, with its
+      pending writes and the blobs it references
+
+    Returns deleted row counts and table sizes before and after.
+    """
+    if not checkpoint_tables_exist():
+        return {"status": "skipped", "message": "Checkpoint tables do not exist"}
+
+    size_before = get_checkpoint_table_sizes()
+    deleted = {}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        deleted["orphan_rows"] = 0
+        for table in CHECKPOINT_TABLES:
+            cursor.execute(DELETE_ORPHAN_THREADS_SQL.format(table=table), ["thread\\_%"])
+            deleted["orphan_rows"] += cursor.rowcount
+
+        cursor.execute(IDLE_THREADS_SQL, [get_retention_grace_minutes()])
+
+        cursor.execute(PRUNE_CHECKPOINTS_SQL)
+        deleted["checkpoints"] = cursor.rowcount
+
+        cursor.execute(PRUNE_WRITES_SQL)
+        deleted["checkpoint_writes"] = cursor.rowcount
+
+        cursor.execute(PRUNE_BLOBS_SQL)
+        deleted["checkpoint_blobs"] = cursor.rowcount
+
+    size_after = get_checkpoint_table_sizes()
+
+    logger.info(
+        f"Checkpoint compaction deleted {deleted}; size before {size_before}, after {size_after} "
+        f"(space is reused after autovacuum)"
+    )
+    return {
+        "status": "success",
+        "deleted": deleted,
+        "size_before": size_before,
+        "size_after": size_after,
+    }
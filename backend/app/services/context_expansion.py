@@ -0,0 +1,134 @@
+import json
+import logging
+from typing import Dict, List, Tuple
+from django.conf import settings
+from django.db import connection
+from langchain_core.documents import Document as Doc
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "docs_chunks"
+
+NEIGHBOR_CHUNKS_SQL = """
+    SELECT e.document, e.cmetadata
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+    WHERE c.name = %s
+      AND e.cmetadata->>'doc_id' = ANY(%s)
+      AND e.cmetadata->>'id' = ANY(%s)
+"""
+
+
+def get_neighbor_window() -> int:
+    """Number of chunks to pull on each side of a retrieved chunk (0 disables expansion)."""
+    return max(0, int(getattr(settings, "RETRIEVAL_NEIGHBOR_CHUNKS", 0)))
+
+
+# Shorter suffix/prefix matches are usually coincidence (a shared space or
+# letter), not splitter overlap, and trimming them would corrupt the text
+MIN_OVERLAP_CHARS = 20
+
+
+def _join_overlapping(left: str, right: str, max_overlap: int = 200) -> str:
+    """Concatenate adjacent chunks, dropping the text the splitter repeated as overlap."""
+    limit = min(len(left), len(right), max_overlap)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    separator = "" if left.endswith(("\n", " ")) or right.startswith(("\n", " ")) else "\n"
+    return left + separator + right
+
+
+def _group_runs(indices: List[int]) -> List[List[int]]:
+    runs = []
+    for index in sorted(indices):
+        if runs and index == runs[-1][-1] + 1:
+            runs[-1].append(index)
+        else:
+            runs.append([index])
+    return runs
+
+
+def fetch_chunks(wanted: Dict[int, set]) -> Dict[Tuple[int, int], str]:
+    """Fetch the given (doc_id -> chunk indices) from the vector store in one query."""
+    doc_ids = [str(doc_id) for doc_id in wanted]
+    chunk_ids = [f"doc_{doc_id}_chunk_{index}" for doc_id, indices in wanted.items() for index in indices]
+
+    with connection.cursor() as cursor:
+        cursor.execute(NEIGHBOR_CHUNKS_SQL, [COLLECTION_NAME, doc_ids, chunk_ids])
+        rows = cursor.fetchall()
+
+    chunks = {}
+    for content, metadata in rows:
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        chunks[(int(metadata["doc_id"]), int(metadata["index"]))] = content
+    return chunks
+
+
+def expand_with_neighbors(docs: List[Doc], window: int = None) -> List[Doc]:
+    """
+    Widen each retrieved chunk with its +/- window neighbours from the same document
+    and merge adjacent hits into a single passage.
+
+    All neighbours are fetched with one batched query. Passages keep the order of
+    their best-ranked hit; documents without doc_id/index metadata pass through.
+    """
+    window = get_neighbor_window() if window is None else window
+    if window <= 0 or not docs:
+        return docs
+
+    wanted: Dict[int, set] = {}
+    hits: Dict[Tuple[int, int], int] = {}
+    passthrough = []
+
+    for rank, doc in enumerate(docs):
+        doc_id = doc.metadata.get("doc_id")
+        index = doc.metadata.get("index")
+        if doc_id is None or index is None:
+            passthrough.append((rank, doc))
+            continue
+        doc_id, index = int(doc_id), int(index)
+        hits.setdefault((doc_id, index), rank)
+        wanted.setdefault(doc_id, set()).update(range(max(0, index - window), index + window + 1))
+
+    if not wanted:
+        return docs
+
+    try:
+        chunks = fetch_chunks(wanted)
+    except Exception as e:
+        logger.error(f"Error fetching neighbour chunks, using retrieved chunks only: {str(e)}")
+        return docs
+
+    # Retrieved chunks are always present even if the fetch missed them
+    for rank, doc in enumerate(docs):
+        key = (doc.metadata.get("doc_id"), doc.metadata.get("index"))
+        if key[0] is not None and key[1] is not None:
+            chunks.setdefault((int(key[0]), int(key[1])), doc.page_content)
+
+    passages = []
+    for doc_id, indices in wanted.items():
+        available = [index for index in indices if (doc_id, index) in chunks]
+        for run in _group_runs(available):
+            ranks = [hits[(doc_id, index)] for index in run if (doc_id, index) in hits]
+            if not ranks:
+                continue
+
+            text = chunks[(doc_id, run[0])]
+            for index in run[1:]:
+                text = _join_overlapping(text, chunks[(doc_id, index)])
+
+            best_rank = min(ranks)
+            metadata = dict(docs[best_rank].metadata)
+            metadata.update({
+                "doc_id": doc_id,
+                "index": run[0],
+                "chunk_indices": run,
+                "hit_indices": sorted(index for index in run if (doc_id, index) in hits),
+            })
+            passages.append((best_rank, Doc(page_content=text, metadata=metadata)))
+
+    merged = sorted(passages + passthrough, key=lambda item: item[0])
+    logger.info(f"Expanded {len(docs)} retrieved chunks into {len(merged)} passages (window={window})")
+    return [doc for _, doc in merged]
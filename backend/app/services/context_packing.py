@@ -0,0 +1,64 @@
+import logging
+from typing import Any, Dict, List
+from django.conf import settings
+from ..services.chat_context import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+NO_RESULTS = "No relevant documents were found for this query."
+
+CITATION_NOTE = "Cite the passages you use by their number, e.g. [1]."
+
+
+def get_context_budget() -> int:
+    """Token budget for the passages one retrieve call sends to the model."""
+    return int(getattr(settings, "RETRIEVAL_CONTEXT_TOKENS", 2000))
+
+
+def _passage_header(number: int, source: Dict[str, Any]) -> str:
+    title = source.get("title") or source.get("file_name") or f"Document {source.get('id')}"
+    year = f", {source['year']}" if source.get("year") else ""
+    return f"[{number}] {title} (doc {source.get('id')}{year})"
+
+
+def pack_sources(sources: List[Dict[str, Any]], budget: int = None) -> str:
+    """
+    Render retrieved sources as numbered, citation-tagged passages that fit the
+    token budget. Passages keep their retrieval order; the passage that crosses
+    the budget is truncated and the rest are dropped. Summaries, tags, preview
+    paths and timestamps are left out; those go to the client separately.
+    """
+    budget = get_context_budget() if budget is None else budget
+    if not sources:
+        return NO_RESULTS
+
+    passages = [
+        (source, (content.get("snippet") or "").strip())
+        for source in sources
+        for content in source.get("contents", [])
+    ]
+
+    blocks = []
+    used = estimate_tokens(CITATION_NOTE)
+
+    for source, snippet in passages:
+        if not snippet:
+            continue
+
+        header = _passage_header(len(blocks) + 1, source)
+        remaining = budget - used - estimate_tokens(header)
+        if remaining <= 50:
+            break
+
+        if estimate_tokens(snippet) > remaining:
+            snippet = snippet[:remaining * 4].rsplit(" ", 1)[0] + " ..."
+
+        block = f"{header}\n{snippet}"
+        blocks.append(block)
+        used += estimate_tokens(block)
+
+    if not blocks:
+        return NO_RESULTS
+
+    logger.info(f"Packed {len(blocks)} passages into ~{used} tokens (budget {budget})")
+    return "\n\n".join(blocks + [CITATION_NOTE])
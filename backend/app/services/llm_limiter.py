@@ -0,0 +1,29 @@
+import asyncio
+import logging
+import weakref
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# One limiter per event loop: asyncio semaphores cannot be shared across loops
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def get_max_concurrency() -> int:
+    """
+    Concurrent summarization LLM calls per worker. Defaults to one less than
+    Ollama's parallel slots so interactive chat always has a slot free.
+    """
+    default = int(getattr(settings, "OLLAMA_NUM_PARALLEL", 2)) - 1
+    return max(1, int(getattr(settings, "SUMMARIZATION_MAX_CONCURRENCY", default)))
+
+
+def get_summarization_limiter() -> asyncio.Semaphore:
+    """Semaphore bounding summarization LLM calls on the running event loop."""
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = asyncio.Semaphore(get_max_concurrency())
+        _limiters[loop] = limiter
+        logger.info(f"Summarization limiter allows {get_max_concurrency()} concurrent LLM calls")
+    return limiter
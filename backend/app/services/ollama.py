@@ -1,7 +1,122 @@
+import json
+import threading
+import httpx
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Sequence
+from django.conf import settings
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_ollama import ChatOllama
+from langchain_classic.retrievers.document_compressors import LLMListwiseRerank
 
 base_url = "http://ollama:11434"
 
+# HTTP client settings for every shared ChatOllama. Idle connections are kept
+# open between calls, so a long-lived event loop (see utils.async_runner) and
+# the sync views reuse them instead of reconnecting for every request.
+OLLAMA_CLIENT_KWARGS = {
+    "limits": httpx.Limits(max_keepalive_connections=16, keepalive_expiry=120),
+}
+
+# Context window (in tokens) each chat model is served with. It is passed to
+# Ollama as num_ctx, so the budgets planned against it (chat history,
+# summarization chunks) hold; otherwise Ollama's smaller default truncates.
+# Models users can select take it from their "context_tokens" in the catalog
+# (constant/llm.json); this covers the ones the backend uses internally.
+INTERNAL_MODEL_CONTEXT_TOKENS = {
+    "llama3.2:1b": 8192,
+}
+DEFAULT_CONTEXT_TOKENS = 4096
+
+LLM_CATALOG_PATH = Path(__file__).resolve().parent.parent / "constant" / "llm.json"
+
+
+@lru_cache(maxsize=1)
+def get_catalog_context_tokens() -> dict:
+    with open(LLM_CATALOG_PATH, "r") as f:
+        return {model["code"]: model["context_tokens"] for model in json.load(f) if model.get("context_tokens")}
+
+
+def get_model_context_tokens(model: Optional[str]) -> int:
+    """Context window the model is served with (CHAT_CONTEXT_TOKENS overrides the catalog)."""
+    overrides = getattr(settings, "CHAT_CONTEXT_TOKENS", {}) or {}
+    return (
+        overrides.get(model)
+        or get_catalog_context_tokens().get(model)
+        or INTERNAL_MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+    )
+
+
 LLAMA_CHAT = ChatOllama(model="llama3.2:1b", base_url=base_url, temperature=0)
 QWEN_CHAT = ChatOllama(model="qwen3:0.7b", base_url=base_url, temperature=0)
-HERMES_CHAT = ChatOllama(model="hermes3:3b", base_url=base_url, temperature=0)
\ No newline at end of file
+HERMES_CHAT = ChatOllama(model="hermes3:3b", base_url=base_url, temperature=0)
+
+# --- Runnable Registry -------------------------------------------------------
+# Chat models and the runnables composed from them are built once per
+# configuration and shared across requests and threads, so every call reuses
+# the same ChatOllama instance and its HTTP client.
+_registry: dict = {}
+# Reentrant: factories build on other registry entries (e.g. a bound model on its base model)
+_registry_lock = threading.RLock()
+
+
+def get_cached(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Return the registry entry for key, building it with factory on first use."""
+    runnable = _registry.get(key)
+    if runnable is None:
+        with _registry_lock:
+            runnable = _registry.get(key)
+            if runnable is None:
+                runnable = factory()
+                _registry[key] = runnable
+    return runnable
+
+
+def _tools_key(tools: Optional[Sequence]) -> tuple:
+    return tuple(getattr(t, "name", t) for t in tools or ())
+
+
+def get_chat_model(model: str, temperature: float = 0, tools: Optional[Sequence] = None, schema: Optional[type] = None):
+    """Shared ChatOllama for the given model and temperature, optionally bound to tools or a structured schema."""
+    def build():
+        if tools or schema is not None:
+            llm = get_chat_model(model, temperature)
+        else:
+            llm = ChatOllama(
+                model=model,
+                base_url=base_url,
+                temperature=temperature,
+                num_ctx=get_model_context_tokens(model),
+                client_kwargs=OLLAMA_CLIENT_KWARGS,
+            )
+        if tools:
+            return llm.bind_tools(tools)
+        if schema is not None:
+            return llm.with_structured_output(schema=schema)
+        return llm
+
+    if tools or schema is not None:
+        return get_cached(("chat", model, temperature, _tools_key(tools), schema), build)
+    return get_cached(("chat", model, temperature), build)
+
+
+def get_runnable(
+    prompt: ChatPromptTemplate,
+    model: str,
+    temperature: float = 0,
+    tools: Optional[Sequence] = None,
+    schema: Optional[type] = None,
+):
+    """Shared `prompt | model` runnable. Prompts are expected to be module-level constants."""
+    return get_cached(
+        ("runnable", id(prompt), model, temperature, _tools_key(tools), schema),
+        lambda: prompt | get_chat_model(model, temperature, tools=tools, schema=schema),
+    )
+
+
+def get_reranker(model: str, top_n: int = 10) -> LLMListwiseRerank:
+    """Shared listwise reranker backed by the model's shared ChatOllama."""
+    return get_cached(
+        ("rerank", model, top_n),
+        lambda: LLMListwiseRerank.from_llm(get_chat_model(model, temperature=0), top_n=top_n),
+    )
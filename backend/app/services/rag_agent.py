@@ -4,14 +4,16 @@ from typing_extensions import TypedDict
 from pydantic import BaseModel
 from langgraph.graph import StateGraph, START, END
 from langchain_core.prompts import ChatPromptTemplate
-from ..services.ollama import base_url
-from langchain_ollama import ChatOllama
-from ..services.vectorstore import vector_store
+from langchain_core.runnables import RunnableLambda
+from ..services.ollama import get_runnable, get_reranker
+from ..services.vectorstore import get_vector_store
+from ..utils.lazy import lazy
+from ..services.retrieval_filters import RetrievalFilter, matches_nothing
+from ..services.context_expansion import expand_with_neighbors
 import logging
 from ..models import Document
 from langchain_core.documents import Document as Doc
 from langchain_classic.retrievers.contextual_compression import ContextualCompressionRetriever
-from langchain_classic.retrievers.document_compressors import LLMListwiseRerank
 from ..constant.prompts import SUMMARIZER_PROMPT
 logger = logging.getLogger(__name__)
 
@@ -27,8 +29,8 @@ class State(TypedDict):
     documents: List[Doc]
     sources: List[Dict[str, Any]]
     summary: str
-    years: List[str]
-    tags: List[str]
+    filters: Dict[str, Any]
+    neighbors: Optional[int]
 
 
 def retrieve(state: State):
@@ -39,36 +41,35 @@ def retrieve(state: State):
         query (str): The query to retrieve documents on.
     """
     query = state.get("query")
-    years = state.get("years")
-    tags = state.get("tags")
+    retrieval_filter = RetrievalFilter.from_params(**(state.get("filters") or {}))
 
     search_kwargs = {
         "score_threshold": 0.3,
     }
 
-    filters = {}
-    if years:
-        filters["year"] = {"$in": years}
-    
-    if tags:
-        filters["tags"] = {"$in": tags}
-    
-    if filters:
-        search_kwargs["filter"] = filters
+    vector_filter = retrieval_filter.to_vector_filter()
+    if matches_nothing(vector_filter):
+        logger.info(f"No documents match {retrieval_filter}, skipping vector search")
+        return {
+            "documents": []
+        }
+
+    if vector_filter:
+        search_kwargs["filter"] = vector_filter
 
-    retriever = vector_store.as_retriever(
+    retriever = get_vector_store().as_retriever(
         search_type="similarity_score_threshold",
         search_kwargs=search_kwargs,
     )
     
 
-    llm = ChatOllama(model=MODEL, base_url=base_url, temperature=0)
-    compressor = LLMListwiseRerank.from_llm(llm, top_n=10)
+    compressor = get_reranker(MODEL, top_n=10)
     compression_retriever = ContextualCompressionRetriever(
         base_compressor=compressor, base_retriever=retriever
     )
 
     docs = compression_retriever.invoke(query)
+    docs = expand_with_neighbors(docs, state.get("neighbors"))
 
     return {
         "documents": docs
@@ -118,15 +119,16 @@ def transform_documents(state: State):
             }
 
         sources_map[doc_id]["contents"].append({
-            "snippet":     snippet,
-            "chunk_index": chunk_index,
+            "snippet":       snippet,
+            "chunk_index":   chunk_index,
+            "chunk_indices": doc.metadata.get("chunk_indices", [chunk_index]),
         })
 
     return {
         "sources": list(sources_map.values()),
     }
 
-def summarize(state: State):
+def get_summarize_input(state: State):
     sources = state.get("sources")
 
     formatted_sources = ""
@@ -141,17 +143,27 @@ def summarize(state: State):
             formatted_sources += f"**{content['snippet']}**\n"
 
     logger.info(f"==SUMMARIZE== formatted_sources: {formatted_sources}")
-  
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", SUMMARIZER_PROMPT),
-        ("human", "Here are the sources:\n{sources}\n\nQuery: {query}")
-    ])
 
-    # Bind the prompt with the chat model and structured output
-    runnable = prompt | ChatOllama(model=MODEL, base_url=base_url, temperature=0)
+    return {"sources": formatted_sources, "query": state.get("query")}
+
+summarize_prompt = ChatPromptTemplate.from_messages([
+    ("system", SUMMARIZER_PROMPT),
+    ("human", "Here are the sources:\n{sources}\n\nQuery: {query}")
+])
 
+def get_summarize_runnable():
+    return get_runnable(summarize_prompt, MODEL, temperature=0)
+
+def summarize(state: State):
     # Invoke the model with the conversation text
-    ai_msg = runnable.invoke({"sources": formatted_sources, "query": state.get("query")})
+    ai_msg = get_summarize_runnable().invoke(get_summarize_input(state))
+
+    return {
+        "summary": ai_msg.content,
+    }
+
+async def asummarize(state: State):
+    ai_msg = await get_summarize_runnable().ainvoke(get_summarize_input(state))
 
     return {
         "summary": ai_msg.content,
@@ -160,21 +172,34 @@ def summarize(state: State):
 class ShouldAnswerSchema(BaseModel):
     should_answer: bool
 
-def should_answer_query(state: State):
-    query = state.get("query")
-    
-    system_prompt = """
+SHOULD_ANSWER_PROMPT = """
 Evaluate the query to determine if it requires an answer.
 Respond with **True** if the query is a question needing an answer, otherwise respond with **False** if it is a statement or does not require an answer.
     """
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("human", f"Is the query a question? Query: {query}"),
-    ])
+should_answer_prompt = ChatPromptTemplate.from_messages([
+    ("system", SHOULD_ANSWER_PROMPT),
+    ("human", "Is the query a question? Query: {query}"),
+])
+
+def get_should_answer_chain():
+    return get_runnable(should_answer_prompt, MODEL, temperature=0, schema=ShouldAnswerSchema)
+
+def should_answer_query(state: State):
+    query = state.get("query")
+
+    response = get_should_answer_chain().invoke({"query": query})
+
+    logger.info(f"==SHOULD_ANSWER== query: {query} should_answer: {response.should_answer}")
+
+    return {
+        "should_answer": response.should_answer,
+    }
+
+async def ashould_answer_query(state: State):
+    query = state.get("query")
 
-    chain = prompt | ChatOllama(model=MODEL, base_url=base_url, temperature=0).with_structured_output(schema=ShouldAnswerSchema)
-    response = chain.invoke({"query": query})
+    response = await get_should_answer_chain().ainvoke({"query": query})
 
     logger.info(f"==SHOULD_ANSWER== query: {query} should_answer: {response.should_answer}")
 
@@ -194,9 +219,9 @@ def create_rag_agent():
     builder = StateGraph(State)
 
     builder.add_node("retrieve_documents", retrieve)
-    builder.add_node("check_should_summarize", should_answer_query)
+    builder.add_node("check_should_summarize", RunnableLambda(should_answer_query, afunc=ashould_answer_query))
     builder.add_node("format_sources", transform_documents)
-    builder.add_node("generate_summary", summarize)
+    builder.add_node("generate_summary", RunnableLambda(summarize, afunc=asummarize))
     
     builder.add_edge(START, "retrieve_documents")
     builder.add_edge("retrieve_documents", "format_sources")
@@ -215,4 +240,4 @@ def create_rag_agent():
     
     return builder.compile()
 
-rag_agent = create_rag_agent()
\ No newline at end of file
+get_rag_agent = lazy(create_rag_agent)
\ No newline at end of file
@@ -0,0 +1,144 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+from django.utils import timezone
+
+from ..models import Document
+
+
+def _parse_ints(value, field: str) -> List[int]:
+    """Parse a comma-joined string or a list into a sorted list of unique ints."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, (str, int)):
+        value = str(value).split(",")
+    result = set()
+    for item in value:
+        item = str(item).strip()
+        if not item:
+            continue
+        try:
+            result.add(int(item))
+        except ValueError:
+            raise ValueError(f"Invalid {field} value: {item!r}")
+    return sorted(result)
+
+
+def _parse_date(value, field: str) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid {field} value: {value!r}, expected YYYY-MM-DD")
+
+
+def matches_nothing(vector_filter: Optional[dict]) -> bool:
+    """True when a compiled filter restricts the search to an empty document set."""
+    return bool(vector_filter) and vector_filter.get("doc_id", {}).get("$in") == []
+
+
+class RetrievalFilter:
+    """
+    Typed year, tag, document and date-range constraints for retrieval.
+
+    Constraints are resolved against the relational Document table (indexed
+    year, tags and created_at) and compiled into a doc_id predicate on the
+    vector query, so filtered searches narrow the scan instead of post-filtering.
+    """
+
+    def __init__(
+        self,
+        years: Iterable[int] = (),
+        tag_ids: Iterable[int] = (),
+        document_ids: Iterable[int] = (),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ):
+        self.years = sorted(set(years))
+        self.tag_ids = sorted(set(tag_ids))
+        self.document_ids = sorted(set(document_ids))
+        self.date_from = date_from
+        self.date_to = date_to
+
+        if date_from and date_to and date_from > date_to:
+            raise ValueError("date_from must be on or before date_to")
+
+    @classmethod
+    def from_params(cls, years=None, tags=None, document_ids=None, date_from=None, date_to=None):
+        """Parse raw request values (comma-joined strings or lists). Raises ValueError on bad input."""
+        return cls(
+            years=_parse_ints(years, "year"),
+            tag_ids=_parse_ints(tags, "tags"),
+            document_ids=_parse_ints(document_ids, "document_ids"),
+            date_from=_parse_date(date_from, "date_from"),
+            date_to=_parse_date(date_to, "date_to"),
+        )
+
+    @classmethod
+    def from_request(cls, request):
+        """Parse the year, tags, document_ids, date_from and date_to query parameters."""
+        return cls.from_params(
+            years=request.GET.get("year"),
+            tags=request.GET.get("tags"),
+            document_ids=request.GET.get("document_ids"),
+            date_from=request.GET.get("date_from"),
+            date_to=request.GET.get("date_to"),
+        )
+
+    def as_dict(self) -> dict:
+        """Plain, JSON-serializable form, suitable for graph state and cache keys."""
+        return {
+            "years": self.years,
+            "tags": self.tag_ids,
+            "document_ids": self.document_ids,
+            "date_from": self.date_from.isoformat() if self.date_from else None,
+            "date_to": self.date_to.isoformat() if self.date_to else None,
+        }
+
+    def is_empty(self) -> bool:
+        return not (self.years or self.tag_ids or self.document_ids or self.date_from or self.date_to)
+
+    def document_queryset(self):
+        documents = Document.objects.all()
+        if self.document_ids:
+            documents = documents.filter(id__in=self.document_ids)
+        if self.years:
+            documents = documents.filter(year__in=self.years)
+        if self.tag_ids:
+            documents = documents.filter(tags__id__in=self.tag_ids)
+        # Compare against datetime bounds (not __date) so the created_at index applies
+        if self.date_from:
+            start = timezone.make_aware(datetime.combine(self.date_from, datetime.min.time()))
+            documents = documents.filter(created_at__gte=start)
+        if self.date_to:
+            end = timezone.make_aware(datetime.combine(self.date_to + timedelta(days=1), datetime.min.time()))
+            documents = documents.filter(created_at__lt=end)
+        return documents
+
+    def allowed_document_ids(self) -> Optional[List[int]]:
+        """
+        The set of documents a search may touch, or None when unrestricted.
+        Pure document-id filters skip the database round trip.
+        """
+        if self.is_empty():
+            return None
+        if self.document_ids and not (self.years or self.tag_ids or self.date_from or self.date_to):
+            return self.document_ids
+        return sorted(set(self.document_queryset().order_by().values_list("id", flat=True)))
+
+    def to_vector_filter(self) -> Optional[dict]:
+        """
+        Compile the constraints into a PGVector metadata filter.
+        Returns None when unrestricted; an empty doc_id list means nothing can match.
+        """
+        if self.is_empty():
+            return None
+
+        # Always a doc_id set: the year in chunk metadata is copied at indexing
+        # time and goes stale when the summary is regenerated.
+        return {"doc_id": {"$in": self.allowed_document_ids()}}
+
+    def __repr__(self):
+        return f"RetrievalFilter({self.as_dict()})"
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import logging
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "search"
+VERSION_KEY = f"{CACHE_PREFIX}:version"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase the query and collapse whitespace so trivial variants share an entry."""
+    return " ".join(query.lower().split())
+
+
+def _get_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def make_key(query, filters, is_accurate) -> str:
+    """
+    Build the cache key for a search request from the query and the
+    RetrievalFilter.as_dict() of its year/tag/document/date constraints.
+    The key embeds the current cache version so a single bump invalidates every entry.
+    """
+    payload = json.dumps({
+        "query": normalize_query(query),
+        "filters": filters,
+        "is_accurate": bool(is_accurate),
+    }, sort_keys=True)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{_get_version()}:{digest}"
+
+
+def get_cached_result(query, filters, is_accurate):
+    """Return the cached search result, or None on a miss or cache error."""
+    try:
+        return cache.get(make_key(query, filters, is_accurate))
+    except Exception as e:
+        logger.warning(f"Search cache read failed: {str(e)}")
+        return None
+
+
+def set_cached_result(query, filters, is_accurate, result):
+    """Store a search result for SEARCH_CACHE_TTL seconds."""
+    try:
+        cache.set(
+            make_key(query, filters, is_accurate),
+            result,
+            timeout=getattr(settings, "SEARCH_CACHE_TTL", 600),
+        )
+    except Exception as e:
+        logger.warning(f"Search cache write failed: {str(e)}")
+
+
+def invalidate_search_cache(reason=""):
+    """
+    Invalidate every cached search result.
+    Called whenever a document is added, deleted, re-embedded or re-summarized.
+    """
+    try:
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, timeout=None)
+            version = 2
+        logger.info(f"Search cache invalidated (version {version}){f': {reason}' if reason else ''}")
+    except Exception as e:
+        logger.warning(f"Search cache invalidation failed: {str(e)}")
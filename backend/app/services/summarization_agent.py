@@ -1,29 +1,39 @@
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import ChatOllama
 from pydantic import BaseModel, Field
 from enum import Enum
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from ..models import Tag
+from ..services.ollama import get_chat_model, get_runnable, get_model_context_tokens
+from ..services.llm_limiter import get_summarization_limiter
+from ..services.summarization_progress import chunk_done
+from ..services.year_extraction import is_confident
+from ..services.tag_shortlist import resolve_tag_ids, shortlist_tags
+from ..services.summary_cache import get_chunk_summary, prompt_version, set_chunk_summary
+from ..services.token_counter import count_tokens, get_tokenizer
+from ..utils.lazy import lazy
 from asgiref.sync import sync_to_async
 from ..constant.prompts import (
     SUMMARIZATION_MAP_PROMPT, 
     SUMMARIZATION_REDUCE_PROMPT, 
     SUMMARIZATION_TITLE_PROMPT, 
     SUMMARIZATION_YEAR_PROMPT,
-    SUMMARIZATION_TAGS_PROMPT
+    SUMMARIZATION_TAGS_PROMPT,
+    SUMMARIZATION_METADATA_PROMPT
 )
 
 def get_llm(model_name= "llama3.1:8b"):
-    """Get a language model instance with the specified model name."""
-    return ChatOllama(model=model_name, base_url="http://ollama:11434", temperature=0)
+    """Get the shared language model instance for the specified model name."""
+    return get_chat_model(model_name, temperature=0)
 
-llm = get_llm()
+MAP_HUMAN_TEMPLATE = "Document:\n\n{content}\n\nPlease follow the instructions above to summarize."
 
 map_prompt = ChatPromptTemplate.from_messages([
     ("system", SUMMARIZATION_MAP_PROMPT),
-    ("human", "Document:\n\n{content}\n\nPlease follow the instructions above to summarize.")
+    ("human", MAP_HUMAN_TEMPLATE)
 ])
 
+# Part of the chunk summary cache key
+MAP_PROMPT_VERSION = prompt_version(SUMMARIZATION_MAP_PROMPT, MAP_HUMAN_TEMPLATE)
+
 
 reduce_prompt = ChatPromptTemplate.from_messages([
     ("system", SUMMARIZATION_REDUCE_PROMPT),
@@ -31,12 +41,15 @@ reduce_prompt = ChatPromptTemplate.from_messages([
 ])
 
 
+import asyncio
 import operator
-from typing import Annotated, List, Literal, TypedDict, Callable, Any
+from typing import Annotated, List, Literal, Optional, TypedDict, Callable, Any
 
 from langchain_core.documents import Document
 from langgraph.constants import Send
 from langgraph.graph import END, START, StateGraph
+from langgraph.types import RetryPolicy
+from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,20 +58,26 @@ logger = logging.getLogger(__name__)
 def split_list_of_docs(
     docs: List[Document], length_func: Callable, token_max: int, **kwargs: Any
 ) -> List[List[Document]]:
-    """Split documents into batches that fit within token_max."""
+    """
+    Split documents into batches that fit within token_max.
+    Each document is counted once and batches keep a running total.
+    """
     new_result_doc_list = []
     _sub_result_docs = []
+    _sub_result_tokens = 0
     for doc in docs:
-        _sub_result_docs.append(doc)
-        _num_tokens = length_func(_sub_result_docs, **kwargs)
+        _num_tokens = length_func([doc], **kwargs)
         if _num_tokens > token_max:
-            if len(_sub_result_docs) == 1:
-                raise ValueError(
-                    "A single document was longer than the context length,"
-                    " we cannot handle this."
-                )
-            new_result_doc_list.append(_sub_result_docs[:-1])
-            _sub_result_docs = _sub_result_docs[-1:]
+            raise ValueError(
+                "A single document was longer than the context length,"
+                " we cannot handle this."
+            )
+        if _sub_result_docs and _sub_result_tokens + _num_tokens > token_max:
+            new_result_doc_list.append(_sub_result_docs)
+            _sub_result_docs = []
+            _sub_result_tokens = 0
+        _sub_result_docs.append(doc)
+        _sub_result_tokens += _num_tokens
     new_result_doc_list.append(_sub_result_docs)
     return new_result_doc_list
 
@@ -80,20 +99,56 @@ async def acollapse_docs(
     return Document(page_content=result, metadata=combined_metadata)
 
 
-# Default model name
+# Reduce batch limit when the state carries no planned token_max
 TOKEN_MAX = 5000
-CHUNK_SIZE = 2000
-CHUNK_OVERLAP = 200
 SEPARATOR = ["\n\n", "\n", ".", " ", ""]
 
-summarization_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,           # tokens, or chars if not token-based
-    chunk_overlap=CHUNK_OVERLAP,         # overlap between chunks
-    separators=SEPARATOR
-)
+# Tokens of the model window kept for the system prompt and the reply
+SUMMARY_RESERVED_TOKENS = 1536
+# Conservative characters per token when turning a token budget into a chunk size
+CHARS_PER_TOKEN = 3
+
+def get_input_budget(model_name) -> int:
+    """Tokens of document (or summaries) one summarization call can take for the model."""
+    context = get_model_context_tokens(model_name)
+    return max(context - SUMMARY_RESERVED_TOKENS, context // 2)
+
+def plan_summarization(text: str, model_name) -> dict:
+    """
+    Decide how to summarize a document with the given model:
+
+    - "direct": the whole text fits the model window and is summarized in
+      one call, without a reduce step
+    - "map_reduce": the text is split into chunks of a fixed size per model,
+      the largest that fits the window. The boundaries depend only on the
+      text, not on the document's length, so after an edit the unchanged
+      chunks keep their cached summaries (see summary_cache)
+
+    Also returns the token_max used to batch summaries in the reduce phase.
+    """
+    budget = get_input_budget(model_name)
+    # The whole text is counted once, outside the memoized count_tokens
+    tokens = get_tokenizer(model_name)(text)
+
+    if tokens <= budget:
+        logger.info(f"Summarization plan: direct ({tokens} tokens, budget {budget})")
+        return {"mode": "direct", "chunks": [text], "token_max": budget, "tokens": tokens}
+
+    chunk_size = budget * CHARS_PER_TOKEN
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_size // 10,
+        separators=SEPARATOR
+    )
+    chunks = splitter.split_text(text)
+    logger.info(
+        f"Summarization plan: map_reduce ({tokens} tokens, budget {budget}) "
+        f"in {len(chunks)} chunks of up to {chunk_size} characters"
+    )
+    return {"mode": "map_reduce", "chunks": chunks, "token_max": budget, "tokens": tokens}
 
 def length_function(documents: List[Document], model_name) -> int:
-    return sum(get_llm(model_name).get_num_tokens(doc.page_content) for doc in documents)
+    return sum(count_tokens(doc.page_content, model_name) for doc in documents)
 
 class OverallState(TypedDict):
     contents: List[str]
@@ -104,10 +159,16 @@ class OverallState(TypedDict):
     year: int
     tags: List[str]
     model_name: str 
+    document_id: Optional[int]
+    token_max: Optional[int]
+    # Rule-based year from the document text (see year_extraction) and how the year was decided
+    year_hint: Optional[dict]
+    year_decision: Optional[dict]
 
 class SummaryState(TypedDict):
     content: str
     model_name: str 
+    document_id: Optional[int]
 
 
 # Nodes:
@@ -122,13 +183,26 @@ and the final summary.
 # Generates a summary for a single chunk of text
 async def generate_summary(state: SummaryState):
     model_name = state.get("model_name")
+
+    # Unchanged chunks keep their summary across regenerate/re-extract/edit
+    cached = await sync_to_async(get_chunk_summary)(state["content"], model_name, MAP_PROMPT_VERSION)
+    if cached is not None:
+        logger.info(f"Reusing cached summary for chunk of document {state.get('document_id')}")
+        await sync_to_async(chunk_done)(state.get("document_id"))
+        return {"summaries": [cached]}
+
     prompt = map_prompt.invoke({"content": state["content"]})
     logger.info(f"===================================[GENERATE SUMMARY]===================================")
     logger.info(f"Model name: {model_name}")
     logger.info(f"Prompt: {prompt}")
     logger.info(f"===================================[END GENERATE SUMMARY]===================================")
-    response = await get_llm(model_name).ainvoke(prompt)
 
+    # All chunks are sent at once; the limiter keeps Ollama's queue short
+    async with get_summarization_limiter():
+        response = await get_llm(model_name).ainvoke(prompt)
+
+    await sync_to_async(set_chunk_summary)(state["content"], model_name, MAP_PROMPT_VERSION, response.content)
+    await sync_to_async(chunk_done)(state.get("document_id"))
     return {"summaries": [response.content]}
 
 # Here we define the logic to map out over the documents
@@ -138,8 +212,9 @@ def map_summaries(state: OverallState):
     # Each `Send` object consists of the name of a node in the graph
     # as well as the state to send to that node
     model_name = state.get("model_name")
+    document_id = state.get("document_id")
     return [
-        Send("generate_summary", {"content": content, "model_name": model_name}) 
+        Send("generate_summary", {"content": content, "model_name": model_name, "document_id": document_id}) 
         for content in state["contents"]
     ]
 
@@ -156,129 +231,233 @@ async def _reduce(input: dict, model_name) -> str:
     logger.info(input)
     logger.info(f"===================================[END REDUCE]===================================")
     prompt = reduce_prompt.invoke({"docs": input})
-    response = await get_llm(model_name).ainvoke(prompt)
+    async with get_summarization_limiter():
+        response = await get_llm(model_name).ainvoke(prompt)
     return response.content
 
+def plan_reduce_batches(docs: List[Document], model_name, token_max: int = TOKEN_MAX) -> List[List[Document]]:
+    """
+    Group summaries for one collapse round. Batches always fit token_max; with
+    SUMMARIZATION_REDUCE_MODE = "tree" they also hold at most
+    SUMMARIZATION_REDUCE_FAN_IN summaries, so each round shrinks the list by
+    that factor.
+    """
+    if getattr(settings, "SUMMARIZATION_REDUCE_MODE", "token") != "tree":
+        return split_list_of_docs(docs, lambda docs: length_function(docs, model_name), token_max)
+
+    # One pass over the whole list, so only the last batch can come up short
+    fan_in = max(2, getattr(settings, "SUMMARIZATION_REDUCE_FAN_IN", 4))
+    doc_lists, batch, batch_tokens = [], [], 0
+    for doc in docs:
+        tokens = count_tokens(doc.page_content, model_name)
+        if batch and (len(batch) == fan_in or batch_tokens + tokens > token_max):
+            doc_lists.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(doc)
+        batch_tokens += tokens
+    if batch:
+        doc_lists.append(batch)
+    return doc_lists
+
 # Combines the summaries if they exceed a maximum token limit.
 async def collapse_summaries(state: OverallState):
     model_name = state.get("model_name")
-    doc_lists = split_list_of_docs(
-        state["collapsed_summaries"], lambda docs: length_function(docs, model_name), TOKEN_MAX
-    )
-    results = []
-    for doc_list in doc_lists:
-        results.append(await acollapse_docs(doc_list, lambda x: _reduce(x, model_name)))
+    doc_lists = plan_reduce_batches(state["collapsed_summaries"], model_name, state.get("token_max") or TOKEN_MAX)
+    logger.info(f"Collapsing {len(state['collapsed_summaries'])} summaries in {len(doc_lists)} batches")
+
+    # A lone summary is carried over as is, as long as other batches merge and
+    # the round still shrinks the list; otherwise every batch is rewritten shorter
+    merges = any(len(doc_list) > 1 for doc_list in doc_lists)
+
+    async def reduce_batch(doc_list: List[Document]) -> Document:
+        if merges and len(doc_list) == 1:
+            return doc_list[0]
+        return await acollapse_docs(doc_list, lambda x: _reduce(x, model_name))
+
+    # Batches are independent; the limiter bounds how many reach Ollama at once
+    results = await asyncio.gather(*[reduce_batch(doc_list) for doc_list in doc_lists])
 
-    return {"collapsed_summaries": results}
+    return {"collapsed_summaries": list(results)}
 
 
 # Here we will generate the final summary
 async def generate_final_summary(state: OverallState):
     model_name = state.get("model_name")
+    # A direct plan summarized the whole document in its single map call
+    if len(state["contents"]) == 1:
+        return {"final_summary": state["collapsed_summaries"][0].page_content}
+
     response = await _reduce(state["collapsed_summaries"], model_name)
     return {"final_summary": response}
 
+class TitleModel(BaseModel):
+    title: str = Field(..., description="A concise, descriptive title in Title Case, excluding institutional identifiers.")
+
+class YearModel(BaseModel):
+    year: int = Field(..., description="The four-digit publication year extracted from the document summary.")
+
+class TagsModel(BaseModel):
+    tags: list[str] = Field(description="List of relevant document tags")
+
+class MetadataModel(BaseModel):
+    title: str = Field(..., description="A concise, descriptive title in Title Case, excluding institutional identifiers.")
+    year: int = Field(..., description="The four-digit publication year extracted from the document summary.")
+    tags: list[str] = Field(description="List of relevant document tags")
+
+title_prompt = ChatPromptTemplate.from_messages([
+    ("system", SUMMARIZATION_TITLE_PROMPT),
+    ("human", "Summary:\n\n{summary}")
+])
+
+year_prompt = ChatPromptTemplate.from_messages([
+    ("system", SUMMARIZATION_YEAR_PROMPT),
+    ("human", "Summary:\n\n{summary}")
+])
+
 # Extracts a title from the final summary
 async def generate_title(state: OverallState):
     model_name = state.get("model_name")
-    class TitleModel(BaseModel):
-        title: str = Field(..., description="A concise, descriptive title in Title Case, excluding institutional identifiers.")
-
-    title_prompt = ChatPromptTemplate.from_messages([
-        ("system", SUMMARIZATION_TITLE_PROMPT),
-        ("human", "Summary:\n\n{summary}")
-    ])
-
-    prompt = title_prompt | get_llm(model_name).with_structured_output(TitleModel)
+    prompt = get_runnable(title_prompt, model_name, schema=TitleModel)
     response = await prompt.ainvoke({"summary": state["final_summary"]})
     
     logger.info(f"Extracted title: {response.title}")
     return {"title": response.title}
 
-# Extracts the document year from the final summary
-async def extract_year(state: OverallState):
-    model_name = state.get("model_name")
-    class YearModel(BaseModel):
-        year: int = Field(..., description="The four-digit publication year extracted from the document summary.")
+def year_decision(path: str, year: Optional[int], hint: Optional[dict]) -> dict:
+    """Audit record of how the year was chosen: "rule" or "llm", plus the rule's findings."""
+    return {"path": path, "year": year, "rule": hint}
 
-    year_prompt = ChatPromptTemplate.from_messages([
-        ("system", SUMMARIZATION_YEAR_PROMPT),
-        ("human", "Summary:\n\n{summary}")
-    ])
+# Extracts the document year, from the text rules when they are confident and
+# from the final summary with the LLM otherwise
+async def extract_year(state: OverallState):
+    hint = state.get("year_hint")
+    if is_confident(hint):
+        logger.info(f"Year {hint['year']} from rule '{hint['method']}' ({hint['confidence']}), skipping the LLM")
+        return {"year": hint["year"], "year_decision": year_decision("rule", hint["year"], hint)}
 
-    prompt = year_prompt | get_llm(model_name).with_structured_output(YearModel)
+    model_name = state.get("model_name")
+    prompt = get_runnable(year_prompt, model_name, schema=YearModel)
     response = await prompt.ainvoke({"summary": state["final_summary"]})
     
     logger.info(f"Extracted year: {response.year}")
-    return {"year": response.year}
+    return {"year": response.year, "year_decision": year_decision("llm", response.year, hint)}
+
 
+@sync_to_async
+def fetch_formatted_tags(summary: str) -> str:
+    """The tags closest to the summary as the bullet list the tag prompts embed."""
+    return "\n- ".join([f"{name}: {description}" for name, description in shortlist_tags(summary)])
+
+get_tag_ids = sync_to_async(resolve_tag_ids)
 
 # Assigns tags based on the final summary
 async def assign_tags(state: OverallState):
     model_name = state.get("model_name")
-    
-    # Asynchronously fetch all available tags from the database
-    @sync_to_async
-    def fetch_available_tags():
-        return list(Tag.objects.values_list('name', 'description'))
-    
-    available_tags = await fetch_available_tags()
-    formatted_tags = "\n- ".join([f"{name}: {description}" for name, description in available_tags])
+    formatted_tags = await fetch_formatted_tags(state["final_summary"])
     
     tags_prompt = ChatPromptTemplate.from_messages([
         ("system", SUMMARIZATION_TAGS_PROMPT.format(formatted_tags=formatted_tags)),
         ("human", "Summary:\n\n{summary}")
     ])
 
-    class TagsModel(BaseModel):
-        tags: list[str] = Field(description="List of relevant document tags")
-    
-    prompt = tags_prompt | get_llm(model_name).with_structured_output(TagsModel)
+    # The prompt embeds the current tag list, so only the model is shared
+    prompt = tags_prompt | get_chat_model(model_name, schema=TagsModel)
     response = await prompt.ainvoke({"summary": state["final_summary"]})
     
-    @sync_to_async
-    def get_tag_ids(tag_names):
-        tag_ids = []
-        for tag_name in tag_names:
-            tag = Tag.objects.filter(name=tag_name).first()
-            if tag:
-                tag_ids.append(tag.id)
-        return tag_ids
-    
     tag_ids = await get_tag_ids(response.tags)
     
     logger.info(f"Tags selected: {response.tags}")
     logger.info(f"Tag IDs: {tag_ids}")
     return {"tags": tag_ids}
 
+# Extracts title, year and tags in one call. When the output does not parse,
+# nothing is written and route_metadata_fallback sends the state to the
+# separate nodes.
+async def extract_metadata(state: OverallState):
+    model_name = state.get("model_name")
+    formatted_tags = await fetch_formatted_tags(state["final_summary"])
+
+    metadata_prompt = ChatPromptTemplate.from_messages([
+        ("system", SUMMARIZATION_METADATA_PROMPT.format(formatted_tags=formatted_tags)),
+        ("human", "Summary:\n\n{summary}")
+    ])
+
+    try:
+        prompt = metadata_prompt | get_chat_model(model_name, schema=MetadataModel)
+        response = await prompt.ainvoke({"summary": state["final_summary"]})
+    except Exception as e:
+        logger.warning(f"Single-pass metadata extraction failed, falling back to separate calls: {str(e)}")
+        return {}
+
+    if response is None:
+        logger.warning("Single-pass metadata extraction returned nothing, falling back to separate calls")
+        return {}
+
+    tag_ids = await get_tag_ids(response.tags)
+
+    # The combined call always answers the year; a confident rule still wins
+    hint = state.get("year_hint")
+    if is_confident(hint):
+        year, decision = hint["year"], year_decision("rule", hint["year"], hint)
+    else:
+        year, decision = response.year, year_decision("llm", response.year, hint)
+
+    logger.info(f"Extracted title: {response.title}")
+    logger.info(f"Extracted year: {year} ({decision['path']})")
+    logger.info(f"Tags selected: {response.tags}")
+    logger.info(f"Tag IDs: {tag_ids}")
+    return {"title": response.title, "year": year, "tags": tag_ids, "year_decision": decision}
+
+METADATA_NODES = ["generate_title", "extract_year", "assign_tags"]
+
+def route_metadata(state: OverallState):
+    if getattr(settings, "SUMMARIZATION_METADATA_MODE", "single") == "single":
+        return "extract_metadata"
+    # The three nodes write different keys, so they can run side by side
+    return METADATA_NODES
+
+def route_metadata_fallback(state: OverallState):
+    if state.get("title") is not None:
+        return END
+    return METADATA_NODES
+
 def should_collapse(
     state: OverallState,
 ) -> Literal["collapse_summaries", "generate_final_summary"]:
     model_name = state.get("model_name")
     num_tokens = length_function(state["collapsed_summaries"], model_name)
-    if num_tokens > TOKEN_MAX:
+    if num_tokens > (state.get("token_max") or TOKEN_MAX):
         return "collapse_summaries"
     else:
         return "generate_final_summary"
 
-graph = StateGraph(OverallState)
-graph.add_node("generate_summary", generate_summary)
-graph.add_node("collect_summaries", collect_summaries)
-graph.add_node("collapse_summaries", collapse_summaries)
-graph.add_node("generate_final_summary", generate_final_summary)
-graph.add_node("generate_title", generate_title)
-graph.add_node("extract_year", extract_year)
-graph.add_node("assign_tags", assign_tags)
-
-
-# Edges:
-graph.add_conditional_edges(START, map_summaries, ["generate_summary"])
-graph.add_edge("generate_summary", "collect_summaries")
-graph.add_conditional_edges("collect_summaries", should_collapse)
-graph.add_conditional_edges("collapse_summaries", should_collapse)
-graph.add_edge("generate_final_summary", "generate_title")
-graph.add_edge("generate_title", "extract_year")
-graph.add_edge("extract_year", "assign_tags")
-graph.add_edge("assign_tags", END)
-
-summarization_agent = graph.compile() 
\ No newline at end of file
+def get_retry_policy() -> RetryPolicy:
+    """Retry for LLM nodes, e.g. when Ollama times out or drops a request under load."""
+    return RetryPolicy(max_attempts=getattr(settings, "SUMMARIZATION_MAX_ATTEMPTS", 3), initial_interval=2.0)
+
+def create_summarization_agent():
+    graph = StateGraph(OverallState)
+    # A failed chunk is retried on its own; the other chunks keep their results
+    graph.add_node("generate_summary", generate_summary, retry_policy=get_retry_policy())
+    graph.add_node("collect_summaries", collect_summaries)
+    graph.add_node("collapse_summaries", collapse_summaries, retry_policy=get_retry_policy())
+    graph.add_node("generate_final_summary", generate_final_summary, retry_policy=get_retry_policy())
+    graph.add_node("generate_title", generate_title)
+    graph.add_node("extract_year", extract_year)
+    graph.add_node("assign_tags", assign_tags)
+    graph.add_node("extract_metadata", extract_metadata)
+
+    # Edges:
+    graph.add_conditional_edges(START, map_summaries, ["generate_summary"])
+    graph.add_edge("generate_summary", "collect_summaries")
+    graph.add_conditional_edges("collect_summaries", should_collapse)
+    graph.add_conditional_edges("collapse_summaries", should_collapse)
+    graph.add_conditional_edges("generate_final_summary", route_metadata, ["extract_metadata"] + METADATA_NODES)
+    graph.add_conditional_edges("extract_metadata", route_metadata_fallback, [END] + METADATA_NODES)
+    for node in METADATA_NODES:
+        graph.add_edge(node, END)
+
+    return graph.compile()
+
+get_summarization_agent = lazy(create_summarization_agent)
+ 
\ No newline at end of file
@@ -0,0 +1,115 @@
+import logging
+import time
+from typing import Optional
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Progress of a running summarization, shared between the Celery worker and the API
+PROGRESS_TIMEOUT = 60 * 60 * 6
+
+FIELDS = (
+    "phase", "chunks_total", "chunks_done", "collapse_rounds",
+    "metadata_steps_done", "started_at", "updated_at",
+)
+
+# Graph nodes that extract the title, year and tags
+METADATA_NODES = {"extract_metadata", "generate_title", "extract_year", "assign_tags"}
+
+
+def _key(document_id: int, field: str) -> str:
+    return f"summarization:{document_id}:{field}"
+
+
+def _touch(document_id: int, **fields) -> None:
+    values = {**fields, "updated_at": time.time()}
+    cache.set_many({_key(document_id, field): value for field, value in values.items()}, timeout=PROGRESS_TIMEOUT)
+
+
+def _incr(document_id: int, field: str) -> Optional[int]:
+    try:
+        value = cache.incr(_key(document_id, field))
+    except ValueError:
+        # Expired or never started
+        return None
+    _touch(document_id)
+    return value
+
+
+def start_progress(document_id: Optional[int], chunks_total: int) -> None:
+    if document_id is None:
+        return
+    now = time.time()
+    _touch(
+        document_id,
+        phase="map",
+        chunks_total=chunks_total,
+        chunks_done=0,
+        collapse_rounds=0,
+        metadata_steps_done=0,
+        started_at=now,
+    )
+
+
+def chunk_done(document_id: Optional[int]) -> None:
+    if document_id is None:
+        return
+    done = _incr(document_id, "chunks_done")
+    if done is None:
+        return
+    total = cache.get(_key(document_id, "chunks_total"))
+    logger.info(f"Summarized chunk {done}/{total} of document {document_id}")
+
+
+def step_done(document_id: Optional[int], node: str) -> None:
+    """
+    Record a finished summarization graph node. Chunk summaries are counted
+    by chunk_done; this tracks the phase, collapse rounds and metadata steps.
+    """
+    if document_id is None:
+        return
+    if node == "collect_summaries":
+        _touch(document_id, phase="reduce")
+    elif node == "collapse_summaries":
+        rounds = _incr(document_id, "collapse_rounds")
+        logger.info(f"Collapse round {rounds} done for document {document_id}")
+    elif node == "generate_final_summary":
+        _touch(document_id, phase="metadata")
+    elif node in METADATA_NODES:
+        _incr(document_id, "metadata_steps_done")
+
+
+def finish_progress(document_id: Optional[int], phase: str = "done") -> None:
+    """Mark the summarization as finished ("done") or stopped ("failed")."""
+    if document_id is None:
+        return
+    _touch(document_id, phase=phase)
+
+
+def get_progress(document_id: int) -> Optional[dict]:
+    """
+    Current counters of a document's summarization, with elapsed time, the
+    seconds since the last change (to spot stalls) and, during the map phase,
+    an estimate of the seconds left in it.
+    """
+    values = cache.get_many([_key(document_id, field) for field in FIELDS])
+    if not values:
+        return None
+
+    progress = {field: values.get(_key(document_id, field)) for field in FIELDS}
+    for field in ("chunks_total", "chunks_done", "collapse_rounds", "metadata_steps_done"):
+        progress[field] = progress[field] or 0
+
+    now = time.time()
+    started_at, updated_at = progress.pop("started_at"), progress.pop("updated_at")
+    progress["elapsed_seconds"] = round(now - started_at) if started_at else None
+    progress["seconds_since_update"] = round(now - updated_at) if updated_at else None
+
+    # Chunks are mapped at a roughly steady rate, so the rate so far predicts the rest
+    done, total = progress["chunks_done"], progress["chunks_total"]
+    if progress["phase"] == "map" and started_at and 0 < done < total:
+        progress["map_eta_seconds"] = round((now - started_at) / done * (total - done))
+    else:
+        progress["map_eta_seconds"] = None
+
+    return progress
@@ -0,0 +1,41 @@
+import hashlib
+import logging
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "summary-chunk"
+
+
+def prompt_version(*templates: str) -> str:
+    """Short digest of the prompt text, so editing a prompt retires its cached outputs."""
+    return hashlib.sha256("\n".join(templates).encode("utf-8")).hexdigest()[:12]
+
+
+def make_key(content: str, model_name: str, version: str) -> str:
+    """Cache key of one chunk summary: (chunk hash, model name, prompt version)."""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{version}:{model_name}:{digest}"
+
+
+def get_chunk_summary(content: str, model_name: str, version: str) -> Optional[str]:
+    """Return the cached map output for a chunk, or None on a miss or cache error."""
+    try:
+        return cache.get(make_key(content, model_name, version))
+    except Exception as e:
+        logger.warning(f"Summary cache read failed: {str(e)}")
+        return None
+
+
+def set_chunk_summary(content: str, model_name: str, version: str, summary: str) -> None:
+    """Store a chunk summary for SUMMARY_CACHE_TTL seconds."""
+    try:
+        cache.set(
+            make_key(content, model_name, version),
+            summary,
+            timeout=getattr(settings, "SUMMARY_CACHE_TTL", 60 * 60 * 24 * 30),
+        )
+    except Exception as e:
+        logger.warning(f"Summary cache write failed: {str(e)}")
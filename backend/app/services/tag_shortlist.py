@@ -0,0 +1,87 @@
+import hashlib
+import logging
+from typing import List, Tuple
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from ..models import Tag
+from ..services.vectorstore import EMBEDDING_MODEL_ID, get_embeddings
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "tag-embedding"
+
+# Tag embeddings never go stale: editing a tag changes its key
+TAG_EMBEDDING_TIMEOUT = None
+
+
+def get_shortlist_size() -> int:
+    return int(getattr(settings, "TAG_SHORTLIST_SIZE", 15))
+
+
+def _tag_text(name: str, description: str) -> str:
+    return f"{name}: {description}" if description else name
+
+
+def make_key(name: str, description: str) -> str:
+    """Cache key of a tag's embedding, derived from the embedding model and the tag text."""
+    digest = hashlib.sha256(_tag_text(name, description).encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{EMBEDDING_MODEL_ID}:{digest}"
+
+
+def get_tag_embeddings(tags: List[Tuple[str, str]]) -> List[List[float]]:
+    """Embeddings of (name, description) pairs, embedding only the tags not cached yet."""
+    keys = [make_key(name, description) for name, description in tags]
+    try:
+        cached = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Tag embedding cache read failed: {str(e)}")
+        cached = {}
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        vectors = get_embeddings().embed_documents([_tag_text(*tags[i]) for i in missing])
+        new_entries = {keys[i]: vector for i, vector in zip(missing, vectors)}
+        try:
+            cache.set_many(new_entries, timeout=TAG_EMBEDDING_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Tag embedding cache write failed: {str(e)}")
+        cached.update(new_entries)
+        logger.info(f"Embedded {len(missing)} tags ({len(tags) - len(missing)} cached)")
+
+    return [cached[key] for key in keys]
+
+
+def shortlist_tags(summary: str, k: int = None) -> List[Tuple[str, str]]:
+    """
+    The k tags (name, description) most similar to the summary, most similar
+    first. Every tag is returned when there are no more than k, or when the
+    embeddings cannot be computed.
+    """
+    k = get_shortlist_size() if k is None else k
+    tags = list(Tag.objects.values_list("name", "description"))
+    if len(tags) <= k:
+        return tags
+
+    try:
+        tag_vectors = np.array(get_tag_embeddings(tags))
+        query = np.array(get_embeddings().embed_query(summary))
+    except Exception as e:
+        logger.warning(f"Tag shortlist unavailable, offering all {len(tags)} tags: {str(e)}")
+        return tags
+
+    scores = tag_vectors @ query / (np.linalg.norm(tag_vectors, axis=1) * np.linalg.norm(query) + 1e-10)
+    top = np.argsort(-scores)[:k]
+    logger.info(f"Shortlisted {len(top)} of {len(tags)} tags")
+    return [tags[i] for i in top]
+
+
+def resolve_tag_ids(tag_names: List[str]) -> List[int]:
+    """Ids of the named tags in the given order, in one query. Unknown names are skipped."""
+    ids_by_name = dict(Tag.objects.filter(name__in=tag_names).values_list("name", "id"))
+    tag_ids = []
+    for name in tag_names:
+        tag_id = ids_by_name.get(name)
+        if tag_id is not None and tag_id not in tag_ids:
+            tag_ids.append(tag_id)
+    return tag_ids
@@ -0,0 +1,21 @@
+import logging
+from functools import lru_cache
+from ..services.ollama import get_chat_model
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: str):
+    """
+    Token counter for a model, built once. Ollama does not expose its
+    tokenizers, so this is the model's LangChain tokenizer (GPT-2 based),
+    which the tokenizer library itself loads only once per process.
+    """
+    return get_chat_model(model_name, temperature=0).get_num_tokens
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str, model_name: str) -> int:
+    """Token count of text for the model, memoized per (text, model)."""
+    return get_tokenizer(model_name)(text)
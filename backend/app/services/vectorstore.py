@@ -1,5 +1,6 @@
 from langchain_postgres import PGVector
 from langchain_ollama import OllamaEmbeddings
+from ..utils.lazy import lazy
 
 DB_URI = "postgresql+psycopg://postgres:postgres@db:5432/app_db"
 DBNAME = "app_db"
@@ -11,17 +12,38 @@ DBPORT = 5432
 DB_URI = f"postgresql+psycopg://{DBUSER}:{DBPASSWORD}@{DBHOST}:{DBPORT}/{DBNAME}"
 
 EMBEDDING_MODEL_ID = "mxbai-embed-large"
-EMBEDDINGS = OllamaEmbeddings(model=EMBEDDING_MODEL_ID, base_url="http://ollama:11434")
 
-vector_store = PGVector(
-    embeddings=EMBEDDINGS,
-    collection_name="docs_chunks",
-    connection=DB_URI,  
-    use_jsonb=True,
+@lazy
+def get_embeddings():
+    return OllamaEmbeddings(model=EMBEDDING_MODEL_ID, base_url="http://ollama:11434")
+
+# Backs the doc_id predicate of filtered searches and the chunk window lookup
+# of context expansion. Built without blocking writes to the table.
+CHUNK_DOC_ID_INDEX_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_langchain_pg_embedding_doc_id "
+    "ON langchain_pg_embedding ((cmetadata->>'doc_id'))"
 )
 
 
-retriever = vector_store.as_retriever(
-    search_type="similarity_score_threshold",
-    search_kwargs={"score_threshold": 0.3},
-)
\ No newline at end of file
+def ensure_chunk_indexes(vector_store: PGVector) -> None:
+    """
+    Create the chunk metadata indexes next to the tables PGVector just created.
+    Migration 0019 covers tables that already existed; a no-op once the index is there.
+    """
+    # CONCURRENTLY cannot run inside a transaction
+    with vector_store._engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql(CHUNK_DOC_ID_INDEX_SQL)
+
+
+# PGVector creates its extension, tables and collection when constructed, so
+# it is only built the first time something searches or writes
+@lazy
+def get_vector_store():
+    vector_store = PGVector(
+        embeddings=get_embeddings(),
+        collection_name="docs_chunks",
+        connection=DB_URI,
+        use_jsonb=True,
+    )
+    ensure_chunk_indexes(vector_store)
+    return vector_store
@@ -0,0 +1,125 @@
+import logging
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Roughly the first page of extracted text, where memos state their series and date
+HEADER_CHARS = 3000
+
+MONTHS = (
+    r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?"
+    r"|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\.?"
+)
+YEAR = r"((?:19|20)\d{2})"
+
+# "Series of 2023", "Series 2023", "s. 2023", "S.2023"
+SERIES_PATTERN = re.compile(rf"(?:\bseries\s+(?:of\s+)?|\bs\.\s*){YEAR}\b", re.IGNORECASE)
+
+DATE_PATTERNS = [
+    # January 5, 2023 / Jan. 5 2023
+    re.compile(rf"\b{MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+{YEAR}\b", re.IGNORECASE),
+    # 5 January 2023 / 5th of January, 2023
+    re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+(?:day\s+)?(?:of\s+)?{MONTHS},?\s+{YEAR}\b", re.IGNORECASE),
+    # 2023-01-05
+    re.compile(rf"\b{YEAR}-\d{{1,2}}-\d{{1,2}}\b"),
+    # 01/05/2023 / 1-5-2023
+    re.compile(rf"\b\d{{1,2}}[/-]\d{{1,2}}[/-]{YEAR}\b"),
+]
+
+BARE_YEAR_PATTERN = re.compile(rf"\b{YEAR}\b")
+
+# Confidence of each rule when all its matches agree on one year
+SERIES_CONFIDENCE = 0.95
+DATE_CONFIDENCE = 0.85
+BARE_YEAR_CONFIDENCE = 0.5
+# Series markers and dates pointing to different years: the text likely
+# cites other documents ("Pursuant to CMO No. 20, s. 2013"), so the LLM decides
+CONFLICT_CONFIDENCE = 0.5
+
+
+def get_min_confidence() -> float:
+    """Rule results at or above this confidence are used without asking the LLM."""
+    return float(getattr(settings, "YEAR_EXTRACTION_MIN_CONFIDENCE", 0.8))
+
+
+def _plausible(year: int) -> bool:
+    return 1900 <= year <= timezone.now().year + 1
+
+
+def _find(pattern: re.Pattern, text: str) -> List[Tuple[int, str]]:
+    return [
+        (int(match.group(1)), match.group(0))
+        for match in pattern.finditer(text)
+        if _plausible(int(match.group(1)))
+    ]
+
+
+def _decide(matches: List[Tuple[int, str]], confidence: float) -> Tuple[Optional[int], float]:
+    """
+    The year the matches point to and the rule's confidence in it. When the
+    matches disagree, the most frequent year wins at a confidence scaled by
+    its share of the matches.
+    """
+    counts = Counter(year for year, _ in matches)
+    (year, count), = counts.most_common(1)
+    if len(counts) == 1:
+        return year, confidence
+    return year, round(confidence * count / len(matches), 2)
+
+
+def extract_year_from_text(text: str) -> dict:
+    """
+    Find the document year in the first page of its text, without an LLM.
+
+    Series markers ("Series of 2023", "s. 2023") and written dates are
+    gathered together. When they agree, the most specific rule decides; when
+    they point to different years, the text may only cite other documents, so
+    the dated year is returned at CONFLICT_CONFIDENCE and the LLM decides.
+    Bare four-digit years are the last resort. Returns the year (None when
+    nothing matched), its confidence, the rule that decided ("series",
+    "date", "conflict", "bare_year" or "none") and the matched text as evidence.
+    """
+    header = (text or "")[:HEADER_CHARS]
+
+    series = _find(SERIES_PATTERN, header)
+    dates = [match for pattern in DATE_PATTERNS for match in _find(pattern, header)]
+
+    if series and dates and {year for year, _ in series} != {year for year, _ in dates}:
+        year, _ = _decide(dates, DATE_CONFIDENCE)
+        result = {
+            "year": year,
+            "confidence": CONFLICT_CONFIDENCE,
+            "method": "conflict",
+            "evidence": [evidence for _, evidence in (series[:3] + dates[:3])],
+        }
+        logger.info(f"Rule-based year extraction: {result}")
+        return result
+
+    rules = [
+        ("series", SERIES_CONFIDENCE, series),
+        ("date", DATE_CONFIDENCE, dates),
+        ("bare_year", BARE_YEAR_CONFIDENCE, _find(BARE_YEAR_PATTERN, header)),
+    ]
+
+    for method, confidence, matches in rules:
+        if not matches:
+            continue
+        year, confidence = _decide(matches, confidence)
+        result = {
+            "year": year,
+            "confidence": confidence,
+            "method": method,
+            "evidence": [evidence for _, evidence in matches[:5]],
+        }
+        logger.info(f"Rule-based year extraction: {result}")
+        return result
+
+    return {"year": None, "confidence": 0.0, "method": "none", "evidence": []}
+
+
+def is_confident(hint: Optional[dict]) -> bool:
+    return bool(hint) and hint.get("year") is not None and hint.get("confidence", 0) >= get_min_confidence()
@@ -1,11 +1,15 @@
 from .tasks import (
     extract_text_task,
     chunk_and_embed_text_task,
-    generate_document_summary_task
+    generate_document_summary_task,
+    generate_chat_title_task,
+    compact_checkpoints_task
 )
 
 __all__ = [
     "extract_text_task",
     "chunk_and_embed_text_task",
-    "generate_document_summary_task"
+    "generate_document_summary_task",
+    "generate_chat_title_task",
+    "compact_checkpoints_task"
 ]
\ No newline at end of file
@@ -1,16 +1,26 @@
 import logging
 import os
-import asyncio
 from celery import shared_task
+from celery.worker import state as worker_state
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Q
 from django.utils import timezone
+from langchain_core.messages import HumanMessage
 from langchain_core.documents import Document as Doc
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from functools import lru_cache
 
 from ..constant import DocumentStatus, MarkdownConverter
-from ..models import Document, DocumentStatusHistory, DocumentFullText
-from ..services.vectorstore import vector_store
-from ..services.summarization_agent import summarization_agent, summarization_splitter
+from ..models import Document, DocumentStatusHistory, DocumentFullText, Chat
+from ..services.vectorstore import get_vector_store
+from ..services.summarization_agent import get_summarization_agent, plan_summarization
+from ..services.search_cache import invalidate_search_cache
+from ..services.checkpoints import compact_checkpoints
+from ..services.summarization_progress import finish_progress, start_progress, step_done
+from ..services.year_extraction import extract_year_from_text
+from ..services.chat_title import generate_chat_title, needs_title, TITLE_MIN_MESSAGES, UNTITLED
+from ..utils.async_runner import run_async
     
 logger = logging.getLogger(__name__)
 
@@ -55,7 +65,7 @@ def update_document_status(document, status, update_fields=None, failed=False):
 
 def save_document_chunks(document, docs):
     try:
-        vector_store.add_documents(docs)
+        get_vector_store().add_documents(docs)
         logger.info(f"Added {len(docs)} chunks for document {document.id}")
     except Exception as e:
         logger.error(f"Error adding chunks: {e}")
@@ -268,6 +278,7 @@ def chunk_and_embed_text_task(self, document_id):
         
         document.no_of_chunks = count
         document.save(update_fields=["no_of_chunks"])
+        invalidate_search_cache(f"document {document.id} embedded")
 
         update_document_status(
             document,
@@ -287,6 +298,15 @@ def chunk_and_embed_text_task(self, document_id):
         raise
 
 
+def is_task_revoked(task_id):
+    """
+    True once this worker has received a revoke for the task. Threads, gevent
+    and solo pools share the worker state; prefork children only stop on
+    revoke(terminate=True).
+    """
+    return bool(task_id) and task_id in worker_state.revoked
+
+
 @shared_task(bind=True)
 def generate_document_summary_task(self, document_id):
     """
@@ -297,27 +317,35 @@ def generate_document_summary_task(self, document_id):
         fulltext = DocumentFullText.objects.get(document=document).text
         update_document_status(document, DocumentStatus.GENERATING_SUMMARY)
 
-        chunks = summarization_splitter.split_text(fulltext)
-
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
         model_name = document.summarization_model
         logger.info(f"Using model {model_name} for summarization of document {document_id}")
+        plan = plan_summarization(fulltext, model_name)
+        chunks = plan["chunks"]
+        start_progress(document_id, len(chunks))
         
         async def process_summarization():
             final_state = None
-            async for state in summarization_agent.astream(
-                input={"contents": chunks, "model_name": model_name},
-                stream_mode="values"
+            async for mode, chunk in get_summarization_agent().astream(
+                input={
+                    "contents": chunks,
+                    "model_name": model_name,
+                    "document_id": document_id,
+                    "token_max": plan["token_max"],
+                    "year_hint": extract_year_from_text(fulltext),
+                },
+                stream_mode=["updates", "values"]
             ):
-                final_state = state
+                if mode == "updates":
+                    # Publish each finished node to the progress counters
+                    for node in chunk:
+                        await sync_to_async(step_done)(document_id, node)
+                else:
+                    final_state = chunk
             return final_state
         
-        final_state = loop.run_until_complete(process_summarization())
+        # Runs on the worker's long-lived loop, so the Ollama connections are reused
+        task_id = self.request.id
+        final_state = run_async(process_summarization(), should_cancel=lambda: is_task_revoked(task_id))
 
         logger.info(f"[TITLE] {final_state['title']}")
         logger.info(f"[SUMMARY] {final_state['final_summary']}")
@@ -327,17 +355,21 @@ def generate_document_summary_task(self, document_id):
         document.title = final_state["title"]
         document.summary = final_state["final_summary"]
         document.year = final_state["year"]
+        document.year_extraction = final_state.get("year_decision")
         document.tags.set(final_state["tags"])
         
-        document.save(update_fields=["title", "summary", "year"])
+        document.save(update_fields=["title", "summary", "year", "year_extraction"])
+        invalidate_search_cache(f"document {document.id} summarized")
+        finish_progress(document_id)
         
         update_document_status(document, DocumentStatus.SUMMARY_GENERATION_DONE,
-                            update_fields=["status", "title", "summary", "year"])
+                            update_fields=["status", "title", "summary", "year", "year_extraction"])
 
         return document_id
 
     except Exception as e:
         logger.exception(f"generate_document_summary_task failed for {document_id}")
+        finish_progress(document_id, "failed")
         if 'document' in locals():
             update_document_status(document, DocumentStatus.GENERATING_SUMMARY, failed=True)
         raise
@@ -386,3 +418,63 @@ def process_document_task(self, document_id):
         except Exception as inner_e:
             logger.exception(f"Error updating document status: {str(inner_e)}")
         raise
+
+
+@shared_task(bind=True, ignore_result=True)
+def generate_chat_title_task(self, chat_id, conversation_text):
+    """
+    Generates a chat title in the background, after the reply has been delivered.
+    """
+    try:
+        chat = Chat.objects.get(id=chat_id)
+        if not needs_title(chat.title):
+            return chat.title
+
+        title = generate_chat_title(conversation_text)
+
+        # Don't overwrite a title the user set while we were generating
+        updated = Chat.objects.filter(
+            Q(title__isnull=True) | Q(title="") | Q(title=UNTITLED),
+            id=chat_id,
+        ).update(title=title)
+
+        if updated:
+            logger.info(f"Saved generated title '{title}' for chat {chat_id}")
+        return title
+    except Chat.DoesNotExist:
+        logger.warning(f"Chat {chat_id} no longer exists, skipping title generation")
+    except Exception as e:
+        logger.exception(f"generate_chat_title_task failed for chat {chat_id}: {str(e)}")
+    finally:
+        cache.delete(f"chat-title:{chat_id}")
+
+def schedule_chat_title(chat, messages) -> bool:
+    """
+    Enqueue title generation for an untitled chat once it has enough messages.
+    Returns True when a job was scheduled.
+    """
+    if not needs_title(chat.title) or len(messages) <= TITLE_MIN_MESSAGES:
+        return False
+
+    # Only one pending title job per chat
+    if not cache.add(f"chat-title:{chat.id}", True, timeout=300):
+        return False
+
+    conversation_text = "\n".join([m.content for m in messages if isinstance(m, HumanMessage)])
+    generate_chat_title_task.delay(chat.id, conversation_text)
+    return True
+
+
+@shared_task(bind=True)
+def compact_checkpoints_task(self):
+    """
+    Scheduled maintenance: prune LangGraph checkpoints down to the latest one per
+    chat thread and drop threads of deleted chats. Reports table sizes.
+    """
+    try:
+        result = compact_checkpoints()
+        logger.info(f"compact_checkpoints_task finished: {result}")
+        return result
+    except Exception as e:
+        logger.exception(f"compact_checkpoints_task failed: {str(e)}")
+        return {"status": "error", "message": str(e)}
@@ -17,7 +17,6 @@ from .views.documents import (
     update_doc_markdown,
     search_docs,
     standard_search_docs,
-    chat_with_docs,
     get_graph_image,
     get_chat_history,
     regenerate_preview,
@@ -31,6 +30,11 @@ from .views.documents import (
     delete_chunks,
     check_if_has_similar_filename,
 )
+from .views.async_documents import (
+    async_search_docs,
+    async_chat_with_docs,
+    stream_search_docs,
+)
 from .views.llm import (
     get_llm_models,
     get_llm_model,
@@ -41,6 +45,8 @@ from .views.chats import (
     create_chat,
     delete_chat,
     get_chats_count,
+    get_message_sources,
+    get_checkpointer_pool_stats,
 )
 from .views.tags import (
     get_tags,
@@ -80,19 +86,25 @@ urlpatterns = [
     path('documents/<int:doc_id>/regenerate-summary/', regenerate_summary, name='regenerate_summary'),
     path('documents/<int:doc_id>/reextract/', reextract_doc, name='reextract_doc'),
     path('documents/search/', search_docs, name='search_docs'),
+    path('documents/search/stream/', stream_search_docs, name='stream_search_docs'),
     path('documents/standard-search/', standard_search_docs, name='standard_search_docs'),
-    path('documents/chat/', chat_with_docs, name='chat_with_docs'),
+    # Served by the async view: ASGI buffers SSE responses built on sync generators
+    path('documents/chat/', async_chat_with_docs, name='chat_with_docs'),
+    path('documents/async/search/', async_search_docs, name='async_search_docs'),
+    path('documents/async/chat/', async_chat_with_docs, name='async_chat_with_docs'),
     path('documents/graph/', get_graph_image, name='get_graph_image'),
     path('documents/get_all_tags/', get_all_tags, name='get_all_tags'),
     path('documents/get_all_years/', get_all_years, name='get_all_years'),
     
     # Chat URLs
     path('chats/count/', get_chats_count, name='get_chats_count'),
+    path('chats/pool-stats/', get_checkpointer_pool_stats, name='get_checkpointer_pool_stats'),
     path('chats/recent/', get_recent_chats, name='get_recent_chats'),
     path('chats/<int:chat_id>/', get_chat, name='get_chat'),
     path('chats/create/', create_chat, name='create_chat'),
     path('chats/<int:chat_id>/delete/', delete_chat, name='delete_chat'),
     path('chats/<str:chat_id>/history/', get_chat_history, name='get_chat_history'),
+    path('chats/<int:chat_id>/messages/<str:message_id>/sources/', get_message_sources, name='get_message_sources'),
     
     # Tag URLs
     path('tags/', get_tags, name='get_tags'),
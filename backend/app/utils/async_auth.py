@@ -0,0 +1,42 @@
+import logging
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+_jwt_authentication = JWTAuthentication()
+
+
+@sync_to_async
+def aauthenticate(request):
+    """
+    Authenticate a plain Django request with the same JWT scheme DRF uses.
+    Returns the user or None.
+    """
+    try:
+        result = _jwt_authentication.authenticate(request)
+    except AuthenticationFailed as e:
+        logger.warning(f"Async authentication failed: {str(e)}")
+        return None
+    return result[0] if result else None
+
+
+def async_login_required(view):
+    """
+    Decorator for native async views (DRF's api_view does not support them).
+    Sets request.user from the JWT or responds with 401.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aauthenticate(request)
+        if user is None or not user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401
+            )
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of should_cancel while a coroutine runs
+POLL_INTERVAL = 1.0
+
+
+class RunCancelled(Exception):
+    """The coroutine was cancelled because its caller asked to stop (e.g. the task was revoked)."""
+
+
+class AsyncRunner:
+    """
+    A long-lived event loop on a daemon thread that synchronous code, such as
+    Celery tasks, submits coroutines to.
+
+    Everything bound to the loop lives as long as the worker process: the
+    shared ChatOllama async HTTP clients keep their connections alive between
+    tasks, and the summarization limiter is shared by every task of the
+    worker. With a threads or gevent pool, several tasks run their coroutines
+    on the loop at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # Prefork children inherit this object but not the loop thread
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._start()
+            return self._loop
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name="async-runner", daemon=True)
+        thread.start()
+        ready.wait()
+
+        self._loop, self._thread, self._pid = loop, thread, os.getpid()
+        logger.info(f"Started async runner loop in process {self._pid}")
+
+    def run(self, coro: Coroutine, should_cancel: Optional[Callable[[], bool]] = None) -> Any:
+        """
+        Run a coroutine on the shared loop and block until it finishes.
+
+        The coroutine is cancelled, and RunCancelled raised, when should_cancel()
+        returns true (checked every POLL_INTERVAL seconds). It is also cancelled
+        when the waiting thread is interrupted, e.g. by a soft time limit.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+        try:
+            while True:
+                try:
+                    return future.result(timeout=POLL_INTERVAL)
+                except FutureTimeoutError:
+                    # The coroutine itself may have finished (or raised TimeoutError) just now
+                    if future.done():
+                        return future.result()
+                    if should_cancel is not None and should_cancel():
+                        raise RunCancelled()
+        except BaseException:
+            if future.cancel():
+                logger.info("Cancelled coroutine on the async runner loop")
+            raise
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the loop, closing what is still running on it."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = self._pid = None
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+runner = AsyncRunner()
+
+
+def run_async(coro: Coroutine, should_cancel: Optional[Callable[[], bool]] = None) -> Any:
+    """Run a coroutine on the process-wide async runner. See AsyncRunner.run."""
+    return runner.run(coro, should_cancel=should_cancel)
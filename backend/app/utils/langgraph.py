@@ -1,3 +1,61 @@
+import json
+from typing import Optional
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+
+def serialize_message(msg, sources: Optional[list] = None) -> dict:
+    """
+    Format a LangChain message the way the chat endpoints send it to the frontend.
+    sources, when given, are the full source cards of a retrieve result; its
+    artifact only keeps references to them.
+    """
+    role = "unknown"
+    if isinstance(msg, HumanMessage):
+        role = "user"
+    elif isinstance(msg, AIMessage):
+        role = "assistant"
+    elif isinstance(msg, ToolMessage):
+        role = "tool"
+
+    tool_calls = getattr(msg, "tool_calls", [])
+
+    message = {
+        "id": getattr(msg, "id"),
+        "role": role,
+        "content": getattr(msg, "content", ""),
+        "timestamp": getattr(msg, "additional_kwargs", {}).get("timestamp", ""),
+        "message_type": "message",
+        "tool_call": None,
+        "tool_result": None
+    }
+
+    if role == "assistant" and len(tool_calls) > 0:
+        message["message_type"] = "tool_call"
+        message["tool_call"] = {
+            "name": tool_calls[0].get("name", ""),
+            "query": tool_calls[0].get("args", {}).get("query", ""),
+        }
+    elif role == "tool" and sources is not None:
+        message["tool_result"] = {
+            "sources": sources,
+        }
+        message["content"] = ""
+    elif role == "tool" and isinstance(getattr(msg, "artifact", None), list):
+        # Results checkpointed before the artifact only kept references
+        message["tool_result"] = {
+            "sources": msg.artifact,
+        }
+        message["content"] = ""
+    elif role == "tool" and (message["content"].startswith("{") or message["content"].startswith("[")):
+        # Tool results saved before sources moved to the artifact
+        message["tool_result"] = {
+            "sources": json.loads(message["content"]),
+        }
+        message["content"] = ""
+
+    return message
+
+
 def _print_event(event: dict, _printed: set, max_length=1500):
     current_state = event.get("dialog_state")
     if current_state:
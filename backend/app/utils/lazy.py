@@ -0,0 +1,30 @@
+import functools
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def lazy(factory):
+    """
+    Turn a zero-argument factory into a getter that builds the object on first
+    use and returns the same instance afterwards. Safe to call from several
+    threads; the factory runs once.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def getter():
+        if instance:
+            return instance[0]
+        with lock:
+            if not instance:
+                start = time.perf_counter()
+                instance.append(factory())
+                logger.info(f"Initialized {factory.__module__}.{factory.__name__} in {time.perf_counter() - start:.2f}s")
+        return instance[0]
+
+    getter.is_initialized = lambda: bool(instance)
+    return getter
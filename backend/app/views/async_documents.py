@@ -0,0 +1,265 @@
+import json
+import logging
+import time
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from langchain_core.messages import HumanMessage
+
+from ..models import Chat
+from ..services.catsight_agent import get_async_catsight_agent
+from ..services.chat_messages import MessageRecorder
+from ..services.rag_agent import get_rag_agent
+from ..services.retrieval_filters import RetrievalFilter
+from ..services.search_cache import get_cached_result, set_cached_result
+from ..tasks.tasks import schedule_chat_title
+from ..utils.async_auth import async_login_required
+from ..utils.langgraph import serialize_message
+
+logger = logging.getLogger(__name__)
+
+# Native async search and chat views, plus the streaming search. The SSE
+# bodies are async generators so ASGI streams them instead of buffering.
+# They only free the worker while awaiting LLM/DB I/O when served through
+# inteldocs/asgi.py (e.g. uvicorn); under WSGI Django runs them in a thread.
+
+
+@csrf_exempt
+@require_GET
+@async_login_required
+async def async_search_docs(request):
+    """
+    Async version of search_docs that awaits get_rag_agent().ainvoke.
+    """
+    query = request.GET.get("query", "").strip()
+    try:
+        filters = RetrievalFilter.from_request(request).as_dict()
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    is_accurate = request.GET.get("accurate", "false") == "true"
+
+    if not query:
+        return JsonResponse({"error": "The 'query' parameter is required."}, status=400)
+
+    logger.info(f"Async search query: {query}, filters: {filters}")
+
+    try:
+        start_time = time.time()
+
+        cached = await sync_to_async(get_cached_result)(query, filters, is_accurate)
+        if cached is not None:
+            return JsonResponse({
+                'summary': cached.get("summary", ""),
+                'sources': cached.get("sources", []),
+                'query_time': time.time() - start_time,
+                'cached': True
+            })
+
+        result = await get_rag_agent().ainvoke({"query": query, "is_accurate": is_accurate, "filters": filters})
+
+        query_time = time.time() - start_time
+
+        await sync_to_async(set_cached_result)(query, filters, is_accurate, {
+            "summary": result.get("summary", ""),
+            "sources": result.get("sources", []),
+        })
+
+        return JsonResponse({
+            'summary': result.get("summary", ""),
+            'sources': result.get("sources", []),
+            'query_time': query_time,
+            'cached': False
+        })
+
+    except Exception as e:
+        logger.exception("Async search failed")
+        return JsonResponse({"error": f"Search failed: {str(e)}"}, status=500)
+
+
+@csrf_exempt
+@require_GET
+@async_login_required
+async def stream_search_docs(request):
+    """
+    Streaming variant of async_search_docs using Server-Sent Events (SSE).
+    Emits the hydrated sources as soon as they are formatted, then streams
+    the summary token by token.
+    """
+    query = request.GET.get("query", "").strip()
+    try:
+        filters = RetrievalFilter.from_request(request).as_dict()
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    is_accurate = request.GET.get("accurate", "false") == "true"
+
+    if not query:
+        return JsonResponse({"error": "The 'query' parameter is required."}, status=400)
+
+    logger.info(f"Streaming search query: {query}, filters: {filters}")
+
+    async def event_stream():
+        start_time = time.time()
+
+        yield f"event: start\ndata: {json.dumps({'query': query})}\n\n"
+
+        cached = await sync_to_async(get_cached_result)(query, filters, is_accurate)
+        if cached is not None:
+            yield f"event: sources\ndata: {json.dumps({'sources': cached.get('sources', []), 'cached': True})}\n\n"
+            yield f"event: summary\ndata: {json.dumps({'summary': cached.get('summary', ''), 'cached': True})}\n\n"
+            yield f"event: done\ndata: {json.dumps({'query_time': time.time() - start_time, 'cached': True})}\n\n"
+            return
+
+        sources = []
+        summary = ""
+
+        try:
+            async for mode, chunk in get_rag_agent().astream(
+                {"query": query, "is_accurate": is_accurate, "filters": filters},
+                stream_mode=["updates", "messages"]
+            ):
+                if mode == "updates":
+                    if "format_sources" in chunk:
+                        sources = chunk["format_sources"].get("sources", [])
+                        yield f"event: sources\ndata: {json.dumps({'sources': sources, 'cached': False, 'retrieval_time': time.time() - start_time})}\n\n"
+                    elif "generate_summary" in chunk:
+                        summary = chunk["generate_summary"].get("summary", summary)
+                    continue
+
+                message, metadata = chunk
+                if metadata.get("langgraph_node") != "generate_summary":
+                    continue
+
+                token = getattr(message, "content", "")
+                if token:
+                    yield f"event: token\ndata: {json.dumps({'content': token})}\n\n"
+
+            yield f"event: summary\ndata: {json.dumps({'summary': summary, 'cached': False})}\n\n"
+
+            await sync_to_async(set_cached_result)(query, filters, is_accurate, {
+                "summary": summary,
+                "sources": sources,
+            })
+        except Exception as e:
+            logger.exception("Streaming search failed")
+            yield f"event: error\ndata: {json.dumps({'error': f'Search failed: {str(e)}'})}\n\n"
+
+        yield f"event: done\ndata: {json.dumps({'query_time': time.time() - start_time, 'cached': False})}\n\n"
+
+    response = StreamingHttpResponse(
+        event_stream(),
+        content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@csrf_exempt
+@require_POST
+@async_login_required
+async def async_chat_with_docs(request):
+    """
+    Chat with documents (also served at documents/chat/). Streams the agent with astream over the
+    AsyncPostgresSaver checkpointer using Server-Sent Events (SSE).
+    """
+    try:
+        body = json.loads(request.body or b"{}")
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    if not body:
+        return JsonResponse({"error": "No body provided"}, status=400)
+
+    query = body.get("query")
+    if not query or not isinstance(query, str) or not query.strip():
+        return JsonResponse({"error": "Valid query parameter is required"}, status=400)
+
+    model_id = body.get("model_id", "llama3.1:8b")
+    chat_id = body.get("chat_id")
+    file_ids = body.get("file_ids", [])
+    user = request.user
+
+    async def event_stream():
+        nonlocal chat_id
+        # Initialize or retrieve chat record
+        if not chat_id:
+            chat = await Chat.objects.acreate(user=user, title="Untitled")
+            chat_id = str(chat.id)
+        else:
+            chat = await Chat.objects.filter(id=chat_id, user=user).afirst()
+            if not chat:
+                yield f"event: error\ndata: {json.dumps({'error': f'Chat not found: {chat_id}'})}\n\n"
+                return
+
+        yield f"event: start\ndata: {json.dumps({'chat_id': chat_id})}\n\n"
+
+        recorder = await sync_to_async(MessageRecorder)(chat)
+
+        thread_id = f"thread_{chat_id}"
+        config = {"configurable": {"model": model_id, "thread_id": thread_id}}
+        input_state = {"current_query": query, "messages": [HumanMessage(content=query)], "file_ids": file_ids}
+
+        try:
+            agent = await get_async_catsight_agent()
+            streamed = set()
+            messages = []
+
+            # durability="async" saves each checkpoint while the next step runs
+            async for mode, chunk in agent.astream(
+                input=input_state,
+                config=config,
+                stream_mode=["messages", "custom", "values"],
+                durability="async",
+            ):
+                if mode == "messages":
+                    message_chunk, metadata = chunk
+                    if metadata.get("langgraph_node") != "assistant":
+                        continue
+
+                    delta = message_chunk.content if isinstance(message_chunk.content, str) else ""
+                    if delta:
+                        yield f"event: delta\ndata: {json.dumps({'id': message_chunk.id, 'role': 'assistant', 'content': delta})}\n\n"
+                    continue
+
+                if mode == "custom":
+                    tool_sources = chunk.get("tool_sources") if isinstance(chunk, dict) else None
+                    if tool_sources:
+                        recorder.add_sources(tool_sources["tool_call_id"], tool_sources["sources"])
+                    continue
+
+                state = chunk
+                messages = state.get("messages") or []
+                if not messages:
+                    continue
+
+                await sync_to_async(recorder.record)(messages)
+
+                new_message = messages[-1]
+                if new_message.id in streamed:
+                    continue
+
+                streamed.add(new_message.id)
+                sources = await sync_to_async(recorder.sources_for)(new_message)
+                yield f"event: message\ndata: {json.dumps(serialize_message(new_message, sources=sources))}\n\n"
+
+            # The title is generated by a background job; the client polls the chat for it
+            if await sync_to_async(schedule_chat_title)(chat, messages):
+                yield f"event: title_pending\ndata: {json.dumps({'chat_id': chat_id})}\n\n"
+
+        except Exception as e:
+            logger.error(f"Error streaming async response: {str(e)}", exc_info=True)
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+        # End of stream
+        yield "event: done\ndata: {}\n\n"
+
+    response = StreamingHttpResponse(
+        event_stream(),
+        content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
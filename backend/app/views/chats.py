@@ -4,9 +4,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.core.paginator import Paginator
 
-from ..models import Chat
+from ..models import Chat, ChatMessage
 from ..serializers import ChatSerializer
-from ..utils.permissions import IsAuthenticated, IsOwnerOrAdmin
+from ..services.checkpoints import delete_thread_checkpoints
+from ..services.catsight_agent import get_pool_stats
+from ..utils.permissions import IsAuthenticated, IsOwnerOrAdmin, IsSuperAdmin
 
 logger = logging.getLogger(__name__)
 
@@ -110,6 +112,11 @@ def delete_chat(request, chat_id):
     try:
         chat = Chat.objects.get(id=chat_id, user=request.user)
         chat.delete()
+        try:
+            delete_thread_checkpoints(f"thread_{chat_id}")
+        except Exception as e:
+            # compact_checkpoints_task removes them later
+            logger.error(f"Error deleting checkpoints for chat {chat_id}: {str(e)}")
         return Response({"status": "success", "message": "Chat deleted successfully"}, status=status.HTTP_200_OK)
     except Chat.DoesNotExist:
         return Response({"status": "error", "message": "Chat not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -128,4 +135,40 @@ def get_chats_count(request):
         return Response(
             {"status": "error", "message": f"Failed to get chat count: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        ) 
\ No newline at end of file
+        )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_message_sources(request, chat_id, message_id):
+    """
+    Return the full sources (including retrieved passages) of a tool message.
+    Chat history only includes source previews.
+    """
+    try:
+        message = ChatMessage.objects.only("sources").get(
+            chat_id=chat_id, chat__user=request.user, message_id=message_id
+        )
+        return Response({"sources": message.sources or []}, status=status.HTTP_200_OK)
+    except ChatMessage.DoesNotExist:
+        return Response({"status": "error", "message": "Message not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Error retrieving sources for message {message_id}: {str(e)}", exc_info=True)
+        return Response(
+            {"status": "error", "message": f"Failed to retrieve sources: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@permission_classes([IsSuperAdmin])
+def get_checkpointer_pool_stats(request):
+    """
+    Return size, availability and wait-time metrics of the chat checkpointer pools.
+    """
+    try:
+        return Response(get_pool_stats(), status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error getting checkpointer pool stats: {str(e)}", exc_info=True)
+        return Response(
+            {"status": "error", "message": f"Failed to get pool stats: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -3,7 +3,7 @@ import os
 from django.conf import settings
 
 from celery.result import AsyncResult
-from django.http import FileResponse, StreamingHttpResponse, HttpResponse
+from django.http import FileResponse, HttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.parsers import FormParser, MultiPartParser
@@ -22,14 +22,14 @@ from ..tasks.tasks import (generate_document_summary_task,
                           process_document_task)
 from ..utils.upload import UploadUtils
 from ..utils.permissions import IsAuthenticated, IsSuperAdmin, IsOwnerOrAdmin, AllowAny
-from ..services.vectorstore import vector_store
-from ..services.catsight_agent import catsight_agent
+from ..services.vectorstore import get_vector_store
+from ..services.catsight_agent import get_catsight_agent
 from ..models import DocumentStatus
-import json
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
-from ..services.rag_agent import rag_agent
-from ..services.summarization_agent import summarization_agent
-from ..utils.langgraph import _print_event
+from ..services.rag_agent import get_rag_agent
+from ..services.summarization_agent import get_summarization_agent
+from ..services.retrieval_filters import RetrievalFilter
+from ..services.search_cache import get_cached_result, set_cached_result, invalidate_search_cache
+from ..services.chat_messages import MessageRecorder, get_history_page, has_messages, HISTORY_PAGE_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -45,12 +45,13 @@ def revoke_task(task_id):
 def _delete_chunks(doc_id):
     """Helper function to delete chunks for a document"""
     try:
-        retriever = vector_store.as_retriever(
+        retriever = get_vector_store().as_retriever(
             search_kwargs={"k": 100, "filter": {"doc_id": doc_id}},
         )
         chunks = retriever.get_relevant_documents("")
         ids = [chunk.id for chunk in chunks]
-        vector_store.delete(ids=ids)
+        get_vector_store().delete(ids=ids)
+        invalidate_search_cache(f"chunks deleted for document {doc_id}")
     except Exception as e:
         logger.error(f"Error deleting vector store chunks: {str(e)}")
 
@@ -217,7 +218,7 @@ def get_doc_markdown(request, doc_id):
     try:
         document = Document.objects.get(id=doc_id)
         
-        chunks = vector_store.similarity_search(
+        chunks = get_vector_store().similarity_search(
             "", 
             k=document.no_of_chunks,
             filter={"doc_id": document.id}
@@ -255,12 +256,13 @@ def delete_doc(request, doc_id):
         try:
             logger.info(f"Deleting vector store chunks for document: {doc_id}")
             ids = [f"doc_{doc_id}_chunk_{i}" for i in range(document.no_of_chunks)]
-            vector_store.delete(ids=ids)
+            get_vector_store().delete(ids=ids)
         except Exception as e:
             logger.error(f"Error deleting vector store chunks: {str(e)}")
         
         UploadUtils.delete_document(doc_id)
         document.delete()
+        invalidate_search_cache(f"document {doc_id} deleted")
         
         logger.info(f"Document deleted successfully: {doc_id}")
         return Response(
@@ -312,7 +314,7 @@ def get_doc_chunks(request, doc_id):
         return Response({"status": "error", "message": "Document not found."}, status=status.HTTP_404_NOT_FOUND)
     
     # Get chunks from vector store
-    chunks = vector_store.similarity_search(
+    chunks = get_vector_store().similarity_search(
         "", 
         k=document.no_of_chunks, 
         filter={"doc_id": document.id}
@@ -340,7 +342,8 @@ def update_doc_markdown(request, doc_id):
         )
 
     # 1) Delete old vectors
-    vector_store.delete(filter={"doc_id": doc_id})
+    get_vector_store().delete(filter={"doc_id": doc_id})
+    invalidate_search_cache(f"document {doc_id} markdown updated")
 
     # 2) Update the full‐text
     fulltext, _ = DocumentFullText.objects.get_or_create(document_id=doc_id)
@@ -364,8 +367,10 @@ def update_doc_markdown(request, doc_id):
 @permission_classes([IsAuthenticated])
 def search_docs(request):
     query = request.GET.get("query", "").strip()
-    years = request.GET.get("year", "").strip()
-    tags = request.GET.get("tags", "").strip()
+    try:
+        filters = RetrievalFilter.from_request(request).as_dict()
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     is_accurate = request.GET.get("accurate", "false") == "true"
     
@@ -375,20 +380,35 @@ def search_docs(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    logger.info(f"Search query: {query}, years: {years}, tags: {tags}")
+    logger.info(f"Search query: {query}, filters: {filters}")
 
     try:
         import time
         start_time = time.time()
-        
-        result = rag_agent.invoke({"query": query, "is_accurate": is_accurate, "years": years, "tags": tags})
-        
+
+        cached = get_cached_result(query, filters, is_accurate)
+        if cached is not None:
+            return Response({
+                'summary': cached.get("summary", ""),
+                'sources': cached.get("sources", []),
+                'query_time': time.time() - start_time,
+                'cached': True
+            }, status=status.HTTP_200_OK)
+
+        result = get_rag_agent().invoke({"query": query, "is_accurate": is_accurate, "filters": filters})
+
         query_time = time.time() - start_time
-        
+
+        set_cached_result(query, filters, is_accurate, {
+            "summary": result.get("summary", ""),
+            "sources": result.get("sources", []),
+        })
+
         return Response({
             'summary': result.get("summary", ""),
             'sources': result.get("sources", []),
-            'query_time': query_time
+            'query_time': query_time,
+            'cached': False
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -471,224 +491,45 @@ def standard_search_docs(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def chat_with_docs(request):
-    """
-    Chat with documents endpoint that uses LangGraph with PostgreSQL persistence.
-    Streams AI responses using Server-Sent Events (SSE) protocol.
-    """
-    body = request.data
-    if not body:
-        return Response({"error": "No body provided"}, status=400)
-    
-    query = body.get("query")
-    if not query or not isinstance(query, str) or not query.strip():
-        return Response({"error": "Valid query parameter is required"}, status=400)
-    
-    model_id = body.get("model_id", "llama3.1:8b")
-    chat_id = body.get("chat_id")
-    file_ids = body.get("file_ids", [])
-        
-    def event_stream():
-        nonlocal chat_id, query
-        # Initialize or retrieve chat record
-        if not chat_id:
-            chat = Chat.objects.create(user=request.user, title="Untitled")
-            chat_id = str(chat.id)
-        else:
-            chat = Chat.objects.filter(id=chat_id, user=request.user).first()
-            if not chat:
-                yield f"event: error\ndata: {{\"error\": \"Chat not found: {chat_id}\"}}\n\n"
-                return
-
-        yield f"event: start\ndata: {{\"chat_id\": \"{chat_id}\"}}\n\n"
-
-        thread_id = f"thread_{chat_id}"
-        config = {"configurable": {"model": model_id, "thread_id": thread_id}}
-
-        # Build initial input messages list
-        human_msg = HumanMessage(content=query)
-        input_messages = [human_msg]
-        input_state = {"current_query": query, "messages": input_messages, "file_ids": file_ids}
-
-        try:
-            _printed = set()
-            streamed = set()
-            
-            for state in catsight_agent.stream(
-                input=input_state,
-                config=config,
-                stream_mode="values"
-            ):
-                _print_event(state, _printed)
-                
-                if "title" in state and state.get("should_generate_title") is False and state["title"]:
-                    chat.title = state["title"]
-                    chat.save()
-                    
-                    yield f"event: title\ndata: {{\"title\": \"{state['title']}\"}}\n\n"
-
-                
-                messages = state.get("messages")
-                
-                if messages:
-                    if isinstance(messages, list):
-                        new_message = messages[-1]
-                    
-                    if new_message.id not in streamed:
-                        role = "unknown"
-                        if isinstance(new_message, HumanMessage):
-                            role = "user"
-                        elif isinstance(new_message, AIMessage):
-                            role = "assistant"
-                        elif isinstance(new_message, ToolMessage):
-                            role = "tool"
-                        
-                        tool_calls = getattr(new_message, "tool_calls", [])
-                        is_tool_calls = len(tool_calls) > 0
-                        
-                        message = {
-                            "id": getattr(new_message, "id"),
-                            "role": role,
-                            "content": getattr(new_message, "content", ""),
-                            "timestamp": getattr(new_message, "additional_kwargs", {}).get("timestamp", ""),
-                            "message_type": "message",
-                            "tool_call": None,
-                            "tool_result": None
-                        }
-
-                        if role == "assistant" and is_tool_calls:
-                            message["message_type"] = "tool_call"
-                            
-                            tool_name = tool_calls[0].get("name", "")
-                            args = tool_calls[0].get("args", {})
-                            query = args.get("query", "")
-
-                            message["tool_call"] = {
-                                "name": tool_name,
-                                "query": query,
-                            }
-                            yield f"event: message\ndata: {json.dumps(message)}\n\n"
-                            continue
-
-                        if role == "tool":
-                            if message["content"].startswith("{") or message["content"].startswith("["):
-                                sources = json.loads(message["content"])
-                                message["content"] = ""
-                                message["tool_result"] = {
-                                    "sources": sources,
-                                }
-                                yield f"event: message\ndata: {json.dumps(message)}\n\n"
-                                continue
-
-                        yield f"event: message\ndata: {json.dumps(message)}\n\n"
-                        
-                        streamed.add(new_message.id)
-                    
-                   
-                
-        except Exception as e:
-            logger.error(f"Error streaming response: {str(e)}", exc_info=True)
-            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
-        
-        # End of stream
-        yield "event: done\ndata: {}\n\n"
-    
-    # Return streaming response
-    return StreamingHttpResponse(
-        event_stream(),
-        content_type="text/event-stream"
-    )
-
-
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_chat_history(request, chat_id):
     """
-    Retrieve chat history for a specific chat_id using LangGraph's state.
+    Retrieve a page of chat history from the stored chat messages.
+    Pass ?before=<sequence> to load older messages; the response's
+    next_cursor is null once the start of the chat is reached.
     """
     try:
-        # Configure thread_id based on chat_id
-        thread_id = f"thread_{chat_id}"
-        config = {"configurable": {"thread_id": thread_id}}
-        
-        # Get the state from LangGraph
         try:
-            saved_state = catsight_agent.get_state(config)
-            messages = saved_state.values["messages"]
-            
-            # Get the model ID from the config if available
-            model_id = config.get("configurable", {}).get("model", "llama3.2:1b")
-                        
-            # Filter out tool messages and format for frontend
-            formatted_messages = []
-            sources = []
-            
-            for msg in messages:
-                msg.pretty_print()
-                role = "unknown"
-
-                if isinstance(msg, HumanMessage):
-                    role = "user"
-                elif isinstance(msg, AIMessage):
-                    role = "assistant"
-                elif isinstance(msg, ToolMessage):
-                    role = "tool"
-
-                tool_calls = getattr(msg, "tool_calls", [])
-                is_tool_calls = len(tool_calls) > 0
-
-                message = {
-                    "id": getattr(msg, "id", f"{role}-{len(formatted_messages)}"),
-                    "role": role,
-                    "content": getattr(msg, "content", ""),
-                    "timestamp": getattr(msg, "additional_kwargs", {}).get("timestamp", ""),
-                    "message_type": "message",
-                    "tool_call": None,
-                    "tool_result": None
-                }
+            before = int(request.GET["before"]) if request.GET.get("before") else None
+            limit = int(request.GET.get("limit", HISTORY_PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {"error": "Invalid pagination parameters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-                if role == "assistant" and is_tool_calls:
-                    message["message_type"] = "tool_call"
-                    
-                    tool_name = tool_calls[0].get("name", "")
-                    args = tool_calls[0].get("args", {})
-                    query = args.get("query", "")
+        chat = Chat.objects.filter(id=chat_id, user=request.user).first()
+        if not chat:
+            return Response({"error": "Chat not found"}, status=status.HTTP_404_NOT_FOUND)
 
-                    message["tool_call"] = {
-                        "name": tool_name,
-                        "query": query,
-                    }
-                    formatted_messages.append(message)
-                    continue
-                
-                if role == "tool":
-                    if message["content"].startswith("{") or message["content"].startswith("["):
-                        sources = json.loads(message["content"])
-                        message["content"] = ""
-                        message["tool_result"] = {
-                            "sources": sources,
-                        }
-                        formatted_messages.append(message)
-                        continue
+        # Chats from before messages were stored are copied from the checkpoint once
+        if before is None and not has_messages(chat):
+            config = {"configurable": {"thread_id": f"thread_{chat_id}"}}
+            saved_state = get_catsight_agent().get_state(config)
+            MessageRecorder(chat).record(saved_state.values.get("messages", []))
 
-                formatted_messages.append(message)
+        messages, next_cursor = get_history_page(chat, before=before, limit=limit)
 
-            return Response({
-                "messages": formatted_messages,
-                "model_id": model_id,
-            }, status=status.HTTP_200_OK)
-        except Exception as e:
-            logger.error(f"Error retrieving chat history: {str(e)}")
-            return Response(
-                {"error": f"Failed to retrieve chat history: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response({
+            "messages": messages,
+            "next_cursor": next_cursor,
+            "model_id": "llama3.2:1b",
+        }, status=status.HTTP_200_OK)
     except Exception as e:
         logger.error(f"Error in get_chat_history: {str(e)}")
         return Response(
-            {"error": f"Error: {str(e)}"},
+            {"error": f"Failed to retrieve chat history: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
@@ -700,11 +541,11 @@ def get_graph_image(request):
         agent = request.GET.get("agent")
 
         if agent == "summary":
-            mermaid_text = summarization_agent.get_graph().draw_mermaid()
+            mermaid_text = get_summarization_agent().get_graph().draw_mermaid()
         elif agent == "rag":
-            mermaid_text = rag_agent.get_graph().draw_mermaid()
+            mermaid_text = get_rag_agent().get_graph().draw_mermaid()
         else:
-            mermaid_text = catsight_agent.get_graph().draw_mermaid()
+            mermaid_text = get_catsight_agent().get_graph().draw_mermaid()
         
         html_content = f"""
         <!DOCTYPE html>
@@ -881,7 +722,8 @@ def reextract_doc(request, doc_id):
             logger.info(f"Updated summarization model to {summarization_model} for document {doc_id}")
 
         # 1) Delete old vectors
-        vector_store.delete(filter={"doc_id": doc_id})
+        get_vector_store().delete(filter={"doc_id": doc_id})
+        invalidate_search_cache(f"document {doc_id} re-extracting")
 
         # 2) Delete existing full text if it exists
         DocumentFullText.objects.filter(document=document).delete()
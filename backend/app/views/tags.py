@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 
 from ..models import Tag
 from ..serializers import TagSerializer
+from ..services.search_cache import invalidate_search_cache
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -54,6 +55,7 @@ def update_tag(request, tag_id):
     serializer = TagSerializer(tag, data=request.data, partial=partial)
     if serializer.is_valid():
         serializer.save()
+        invalidate_search_cache(f"tag {tag_id} updated")
         return Response(serializer.data)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -72,4 +74,5 @@ def delete_tag(request, tag_id):
         )
         
     tag.delete()
+    invalidate_search_cache(f"tag {tag_id} deleted")
     return Response(status=status.HTTP_204_NO_CONTENT) 
\ No newline at end of file
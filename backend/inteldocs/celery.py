@@ -1,6 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown, worker_shutdown
 from django.conf import settings
 import logging
 
@@ -17,3 +18,13 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Auto-discover tasks in all installed apps
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+
+# Prefork children get worker_process_shutdown; the threads and solo pools run
+# tasks in the main process, which only gets worker_shutdown
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_async_runner(**kwargs):
+    """Stop the worker process's shared event loop (see app.utils.async_runner)."""
+    from app.utils.async_runner import runner
+    runner.shutdown()
@@ -85,6 +85,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "inteldocs.wsgi.application"
+ASGI_APPLICATION = "inteldocs.asgi.application"
 
 
 # Database
@@ -183,6 +184,80 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP=False
+
+# Chat titles get their own queue and worker (celery_title_worker) so they
+# don't wait behind minutes-long summarization tasks on the default queue
+CELERY_TASK_ROUTES = {
+    'app.tasks.tasks.generate_chat_title_task': {'queue': 'titles'},
+}
+
+# Periodic maintenance, run by `celery -A inteldocs beat`
+CELERY_BEAT_SCHEDULE = {
+    'compact-chat-checkpoints': {
+        'task': 'app.tasks.tasks.compact_checkpoints_task',
+        'schedule': int(os.getenv('CHECKPOINT_COMPACTION_INTERVAL', 60 * 60 * 6)),
+    },
+}
+
+# Shared cache (Redis) so the web and Celery processes see the same entries
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv('CACHE_URL', 'redis://redis:6379/1'),
+    }
+}
+
+# Seconds a semantic search result stays cached
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 600))
+
+# Seconds a chunk summary from the map phase stays cached for re-summarization
+SUMMARY_CACHE_TTL = int(os.getenv('SUMMARY_CACHE_TTL', 60 * 60 * 24 * 30))
+
+# Chunks pulled on each side of a retrieved chunk and merged into one passage (0 disables)
+RETRIEVAL_NEIGHBOR_CHUNKS = int(os.getenv('RETRIEVAL_NEIGHBOR_CHUNKS', 1))
+
+# Token budget for the passages a chat retrieve call sends to the model
+RETRIEVAL_CONTEXT_TOKENS = int(os.getenv('RETRIEVAL_CONTEXT_TOKENS', 2000))
+
+# LangGraph checkpointer connection pools (one sync, one async per process)
+CHECKPOINT_POOL_MIN_SIZE = int(os.getenv('CHECKPOINT_POOL_MIN_SIZE', 2))
+CHECKPOINT_POOL_MAX_SIZE = int(os.getenv('CHECKPOINT_POOL_MAX_SIZE', 20))
+CHECKPOINT_POOL_TIMEOUT = float(os.getenv('CHECKPOINT_POOL_TIMEOUT', 10))
+CHECKPOINT_POOL_MAX_IDLE = float(os.getenv('CHECKPOINT_POOL_MAX_IDLE', 300))
+CHECKPOINT_POOL_MAX_LIFETIME = float(os.getenv('CHECKPOINT_POOL_MAX_LIFETIME', 3600))
+
+# Ollama serves this many requests per model at once (OLLAMA_NUM_PARALLEL on the Ollama server)
+OLLAMA_NUM_PARALLEL = int(os.getenv('OLLAMA_NUM_PARALLEL', 4))
+
+# Concurrent summarization LLM calls per worker; one Ollama slot is left for chat
+SUMMARIZATION_MAX_CONCURRENCY = int(os.getenv('SUMMARIZATION_MAX_CONCURRENCY', max(1, OLLAMA_NUM_PARALLEL - 1)))
+
+# Attempts per summarization LLM step (chunk summary, reduce) before the task fails
+SUMMARIZATION_MAX_ATTEMPTS = int(os.getenv('SUMMARIZATION_MAX_ATTEMPTS', 3))
+
+# Collapse rounds: "token" fills each reduce call up to the token limit; "tree"
+# also caps it at SUMMARIZATION_REDUCE_FAN_IN summaries per call
+SUMMARIZATION_REDUCE_MODE = os.getenv('SUMMARIZATION_REDUCE_MODE', 'token')
+SUMMARIZATION_REDUCE_FAN_IN = int(os.getenv('SUMMARIZATION_REDUCE_FAN_IN', 4))
+
+# Title, year and tags: "single" extracts them in one call and falls back to
+# separate calls when its output does not parse; "parallel" always makes the
+# three calls, concurrently
+SUMMARIZATION_METADATA_MODE = os.getenv('SUMMARIZATION_METADATA_MODE', 'single')
+
+# Tags offered to the model for a document: the ones whose descriptions are
+# most similar to its summary
+TAG_SHORTLIST_SIZE = int(os.getenv('TAG_SHORTLIST_SIZE', 15))
+
+# Rule-based document years at or above this confidence skip the LLM
+YEAR_EXTRACTION_MIN_CONFIDENCE = float(os.getenv('YEAR_EXTRACTION_MIN_CONFIDENCE', 0.8))
+
+# Per-module import time budget enforced by `manage.py check_import_time`
+IMPORT_TIME_BUDGET_MS = int(os.getenv('IMPORT_TIME_BUDGET_MS', 1500))
+
+# Chat threads idle for longer than this keep only their latest LangGraph checkpoint
+CHECKPOINT_RETENTION_GRACE_MINUTES = int(os.getenv('CHECKPOINT_RETENTION_GRACE_MINUTES', 30))
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = []
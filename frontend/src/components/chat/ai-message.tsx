@@ -9,6 +9,7 @@ interface AIMessageProps {
   msg: Message;
   isCopied: boolean;
   sources: any[];
+  sourcesMessageId?: string;
   onCopy: (text: string, id: string) => void;
   onRegenerate?: (id: string) => void;
   thinkingVisibility?: boolean;
@@ -39,6 +40,7 @@ export const AIMessage: React.FC<AIMessageProps> = ({
   msg,
   isCopied,
   sources,
+  sourcesMessageId,
   onCopy,
   onRegenerate,
   thinkingVisibility,
@@ -89,7 +91,7 @@ export const AIMessage: React.FC<AIMessageProps> = ({
 
         <div className="flex items-center gap-2 mt-3">
           {sources && sources.length > 0 && (
-            <SourcesButton sources={sources} />
+            <SourcesButton sources={sources} messageId={sourcesMessageId} />
           )}
 
           <button
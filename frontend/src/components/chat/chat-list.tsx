@@ -25,6 +25,7 @@ interface QuestionSuggestion {
 interface ChatListProps {
   messages: Message[];
   isStreaming?: boolean;
+  isGeneratingTitle?: boolean;
   onRegenerateMessage?: (messageId: string) => void;
   onSelectSuggestion?: (text: string) => void;
 }
@@ -89,6 +90,7 @@ const questionSuggestions: QuestionSuggestion[] = [
 export function ChatList({
   messages,
   isStreaming = false,
+  isGeneratingTitle = false,
   onRegenerateMessage,
   onSelectSuggestion,
 }: ChatListProps) {
@@ -125,11 +127,7 @@ export function ChatList({
     }));
   };
 
-  const shouldShowTitleGeneration =
-    isStreaming &&
-    messages.length > 0 &&
-    messages[messages.length - 1].role === "assistant" &&
-    messages[messages.length - 1].message_type !== "tool_call";
+  const shouldShowTitleGeneration = !isStreaming && isGeneratingTitle;
 
   if (!messages || messages.length === 0) {
     return (
@@ -180,6 +178,11 @@ export function ChatList({
           previousMessage?.role === "tool" &&
           previousMessage.tool_result?.sources.length > 0;
         const sources = hasSources ? previousMessage.tool_result?.sources : [];
+        // History only carries source previews; passages are fetched on open
+        const sourcesMessageId =
+          hasSources && previousMessage.tool_result?.lazy
+            ? previousMessage.id
+            : undefined;
 
         if (msg.role === "tool") {
           return null;
@@ -211,6 +214,7 @@ export function ChatList({
               msg={msg}
               isCopied={isCopied}
               sources={sources}
+              sourcesMessageId={sourcesMessageId}
               onCopy={copyToClipboard}
               onRegenerate={onRegenerateMessage}
               thinkingVisibility={thinkingVisibility[msg.id]}
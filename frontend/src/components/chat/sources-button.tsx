@@ -20,10 +20,11 @@ import {
 
 interface SourcesButtonProps {
   sources: Source[];
+  messageId?: string;
   className?: string;
 }
 
-export function SourcesButton({ sources, className }: SourcesButtonProps) {
+export function SourcesButton({ sources, messageId, className }: SourcesButtonProps) {
   const [sheetOpen, setSheetOpen] = useState(false);
 
   if (!sources || sources.length === 0) return null;
@@ -97,6 +98,7 @@ export function SourcesButton({ sources, className }: SourcesButtonProps) {
 
       <SourcesPanel
         sources={sources}
+        messageId={messageId}
         isOpen={sheetOpen}
         onOpenChange={setSheetOpen}
       />
@@ -7,25 +7,44 @@ import {
 import { Source } from "@/types/message";
 import { format } from "date-fns";
 import { FileText, ExternalLink } from "lucide-react";
-import { getDocumentPreviewUrl, getDocumentUrl } from "@/lib/api";
+import { chatsApi, getDocumentPreviewUrl, getDocumentUrl } from "@/lib/api";
 import { Button } from "@/components/ui/button";
 import { Markdown } from "@/components/markdown";
 import { useState } from "react";
+import { useParams } from "react-router-dom";
+import { useQuery } from "@tanstack/react-query";
 import { ScrollArea } from "@/components/ui/scroll-area";
 
 interface SourcesPanelProps {
   sources: Source[];
+  // Tool message whose full sources are loaded when the panel opens
+  messageId?: string;
   isOpen: boolean;
   onOpenChange: (open: boolean) => void;
 }
 
 export function SourcesPanel({
   sources,
+  messageId,
   isOpen,
   onOpenChange,
 }: SourcesPanelProps) {
+  const { id: chatId } = useParams<{ id: string }>();
+
+  const { data: fullSources } = useQuery({
+    queryKey: ["message-sources", chatId, messageId],
+    queryFn: () =>
+      chatsApi
+        .getMessageSources(Number(chatId), messageId as string)
+        .then((res) => res.data.sources),
+    enabled: isOpen && !!messageId && !!chatId,
+    staleTime: Infinity,
+  });
+
   if (!sources || sources.length === 0) return null;
 
+  const displayedSources = fullSources ?? sources;
+
   return (
     <Sheet open={isOpen} onOpenChange={onOpenChange}>
       <SheetContent className="p-0 overflow-y-auto bg-card text-card-foreground sm:max-w-4xl">
@@ -34,7 +53,7 @@ export function SourcesPanel({
         </SheetHeader>
 
         <div className="grid grid-cols-1 gap-4 p-4">
-          {sources.map((source) => (
+          {displayedSources.map((source) => (
             <SourceItem key={source.id} source={source} />
           ))}
         </div>
@@ -271,7 +271,10 @@ export function DocumentCard({ doc }: DocumentCardProps) {
             </Badge>
 
             {hasStatusHistory && (
-              <StatusHistoryPopover statusHistory={doc.status_history} />
+              <StatusHistoryPopover
+                statusHistory={doc.status_history}
+                summarizationProgress={doc.summarization_progress}
+              />
             )}
           </div>
 
@@ -320,7 +320,10 @@ export function DocumentTable({ documents }: DocumentTableProps) {
                       )}
                     </Badge>
                     {doc.status_history && doc.status_history.length > 0 && (
-                      <StatusHistoryPopover statusHistory={doc.status_history} />
+                      <StatusHistoryPopover
+                        statusHistory={doc.status_history}
+                        summarizationProgress={doc.summarization_progress}
+                      />
                     )}
                   </div>
                 </TableCell>
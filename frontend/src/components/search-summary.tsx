@@ -9,7 +9,7 @@ const cardClassName = "mb-8 border-0 shadow-md";
 
 interface SearchSummaryProps {
   summary: string;
-  queryTime: number;
+  queryTime?: number;
 }
 
 export const SearchSummary = ({ summary, queryTime }: SearchSummaryProps) => {
@@ -3,7 +3,7 @@ import {
   getDocumentProgress,
   getStatusConfig
 } from "@/lib/document-status-config";
-import { StatusHistory } from "@/types";
+import { StatusHistory, SummarizationProgress } from "@/types";
 import { differenceInMilliseconds } from "date-fns";
 import {
   Brain,
@@ -30,10 +30,23 @@ type StatusHistoryWithElapsedTime = StatusHistory & {
 
 interface StatusHistoryPopoverProps {
   statusHistory: StatusHistory[];
+  summarizationProgress?: SummarizationProgress | null;
 }
 
+// Summaries that have not advanced for this long are flagged as stalled
+const STALL_SECONDS = 300;
+
+const SUMMARIZATION_PHASE_LABELS: Record<string, string> = {
+  map: "Summarizing chunks",
+  reduce: "Combining summaries",
+  metadata: "Extracting title, year and tags",
+  done: "Finishing up",
+  failed: "Failed",
+};
+
 export function StatusHistoryPopover({
   statusHistory,
+  summarizationProgress,
 }: StatusHistoryPopoverProps) {
   const progress = getDocumentProgress(statusHistory);
   const [statusesWithElapsed, setStatusesWithElapsed] = useState<
@@ -232,6 +245,32 @@ export function StatusHistoryPopover({
               </div>
             ))}
           </div>
+          {summarizationProgress && (
+            <div className="pt-1 mt-1 space-y-0.5 text-xs border-t text-muted-foreground">
+              <div>
+                {SUMMARIZATION_PHASE_LABELS[summarizationProgress.phase ?? ""] ??
+                  "Summarizing"}
+                : {summarizationProgress.chunks_done}/
+                {summarizationProgress.chunks_total} chunks
+                {summarizationProgress.collapse_rounds > 0 &&
+                  `, ${summarizationProgress.collapse_rounds} collapse rounds`}
+                {summarizationProgress.metadata_steps_done > 0 &&
+                  `, ${summarizationProgress.metadata_steps_done} metadata steps`}
+              </div>
+              {summarizationProgress.map_eta_seconds !== null && (
+                <div>
+                  About {formatElapsedTime(summarizationProgress.map_eta_seconds * 1000)}{" "}
+                  left for the chunks
+                </div>
+              )}
+              {(summarizationProgress.seconds_since_update ?? 0) > STALL_SECONDS && (
+                <div className="text-amber-600">
+                  No progress for{" "}
+                  {formatElapsedTime(summarizationProgress.seconds_since_update! * 1000)}
+                </div>
+              )}
+            </div>
+          )}
           {queueTime > 0 && (
             <div className="pt-1 mt-1 text-xs text-amber-600">
               Queue time: {formatElapsedTime(queueTime)}
@@ -10,11 +10,13 @@ import React, {
 } from "react";
 import { useChatContext } from "@/contexts/chat-context";
 import { generateId } from "@/lib/utils";
+import { chatsApi } from "@/lib/api";
 import { Message } from "@/types/message";
 import { useNavigate } from "react-router-dom";
 
 type ChatAction =
   | { type: "ADD_MESSAGE"; payload: Message }
+  | { type: "APPEND_DELTA"; payload: { id: string; content: string } }
   | { type: "SET_MESSAGES"; payload: Message[] }
   | { type: "SET_ERROR"; error: string };
 
@@ -24,8 +26,37 @@ const chatReducer = (state: Message[], action: ChatAction): Message[] => {
   console.log(`=== PAYLOAD ===`, action?.payload || "NO PAYLOAD");
 
   switch (action.type) {
-    case "ADD_MESSAGE":
-      return [...state, action.payload];
+    case "ADD_MESSAGE": {
+      // Replace a message already built up from streamed deltas
+      const index = state.findIndex((m) => m.id === action.payload.id);
+      if (index === -1) return [...state, action.payload];
+      const next = [...state];
+      next[index] = action.payload;
+      return next;
+    }
+    case "APPEND_DELTA": {
+      const index = state.findIndex((m) => m.id === action.payload.id);
+      if (index === -1) {
+        return [
+          ...state,
+          {
+            id: action.payload.id,
+            role: "assistant",
+            content: action.payload.content,
+            timestamp: new Date().toISOString(),
+            message_type: "message",
+            tool_call: undefined,
+            tool_result: undefined,
+          },
+        ];
+      }
+      const next = [...state];
+      next[index] = {
+        ...next[index],
+        content: next[index].content + action.payload.content,
+      };
+      return next;
+    }
     case "SET_MESSAGES":
       return action.payload;
     case "SET_ERROR":
@@ -36,8 +67,15 @@ const chatReducer = (state: Message[], action: ChatAction): Message[] => {
   }
 };
 
+const TITLE_POLL_INTERVAL_MS = 1500;
+const TITLE_POLL_ATTEMPTS = 20;
+// After the fast attempts, keep checking slowly in case the title job is queued
+const TITLE_SLOW_POLL_INTERVAL_MS = 15000;
+const TITLE_SLOW_POLL_ATTEMPTS = 40;
+
 interface ChatStreamContextType {
   isStreaming: boolean;
+  isGeneratingTitle: boolean;
   newChatId: string | null;
   setNewChatId: (chatId: string | null) => void;
   sendMessage: (
@@ -58,11 +96,45 @@ export function ChatStreamProvider({ children }: { children: ReactNode }) {
   const navigate = useNavigate();
   const abortRef = useRef<AbortController | null>(null);
   const [isStreaming, setIsStreaming] = useState(false);
+  const [isGeneratingTitle, setIsGeneratingTitle] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const { updateChatTitle, addNewChat } = useChatContext();
   const [messages, dispatch] = useReducer(chatReducer, [] as Message[]);
   const [newChatId, setNewChatId] = useState<string | null>(null);
 
+  // Chat titles are generated by a background job after the reply is
+  // delivered, so poll the chat until the title shows up. The spinner only
+  // covers the fast attempts; slower checks then pick up a late title.
+  const pollChatTitle = useCallback(
+    (chatId: string) => {
+      setIsGeneratingTitle(true);
+      let attempts = 0;
+
+      const poll = () => {
+        attempts += 1;
+        chatsApi
+          .getOne(Number(chatId))
+          .then(({ data }) => {
+            if (data.title && data.title !== "Untitled") {
+              updateChatTitle(chatId, data.title);
+              setIsGeneratingTitle(false);
+            } else if (attempts < TITLE_POLL_ATTEMPTS) {
+              setTimeout(poll, TITLE_POLL_INTERVAL_MS);
+            } else if (attempts < TITLE_POLL_ATTEMPTS + TITLE_SLOW_POLL_ATTEMPTS) {
+              setIsGeneratingTitle(false);
+              setTimeout(poll, TITLE_SLOW_POLL_INTERVAL_MS);
+            } else {
+              setIsGeneratingTitle(false);
+            }
+          })
+          .catch(() => setIsGeneratingTitle(false));
+      };
+
+      setTimeout(poll, TITLE_POLL_INTERVAL_MS);
+    },
+    [updateChatTitle]
+  );
+
   const sendMessage = useCallback(
     (userText: string, chatId: string | undefined, modelId: string | null, fileIds?: number[]) => {
       if (!modelId) {
@@ -90,7 +162,7 @@ export function ChatStreamProvider({ children }: { children: ReactNode }) {
         dispatch({ type: "ADD_MESSAGE", payload: userMessage });
       }
 
-      fetch(`/api/documents/chat/`, {
+      fetch(`/api/documents/async/chat/`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -173,6 +245,10 @@ export function ChatStreamProvider({ children }: { children: ReactNode }) {
                   } catch (e) {
                     console.error("Error parsing title event data:", e);
                   }
+                } else if (eventType === "title_pending") {
+                  pollChatTitle(String(data.chat_id));
+                } else if (eventType === "delta") {
+                  dispatch({ type: "APPEND_DELTA", payload: data });
                 } else if (eventType === "message") {
                   const messageData = JSON.parse(dataLine);
                   dispatch({ type: "ADD_MESSAGE", payload: messageData });
@@ -192,7 +268,7 @@ export function ChatStreamProvider({ children }: { children: ReactNode }) {
           }
         });
     },
-    [updateChatTitle, addNewChat, navigate]
+    [updateChatTitle, addNewChat, navigate, pollChatTitle]
   );
 
   useEffect(
@@ -206,6 +282,7 @@ export function ChatStreamProvider({ children }: { children: ReactNode }) {
     <ChatStreamContext.Provider
       value={{
         isStreaming,
+        isGeneratingTitle,
         newChatId,
         setNewChatId,
         sendMessage,
@@ -0,0 +1,109 @@
+import { SearchSource } from "@/types/search";
+import { useEffect, useState } from "react";
+
+export interface StreamSearchParams {
+  query: string;
+  year?: string;
+  tags?: string;
+}
+
+export interface StreamSearchState {
+  sources: SearchSource[] | null;
+  summary: string;
+  queryTime?: number;
+  isStreaming: boolean;
+  error: string | null;
+}
+
+const INITIAL_STATE: StreamSearchState = {
+  sources: null,
+  summary: "",
+  queryTime: undefined,
+  isStreaming: false,
+  error: null,
+};
+
+// AI-powered search over Server-Sent Events: the sources arrive as soon as
+// retrieval is done and the summary is streamed token by token after them.
+export function useSearchStream(params: StreamSearchParams | null) {
+  const [state, setState] = useState<StreamSearchState>(INITIAL_STATE);
+
+  useEffect(() => {
+    if (!params?.query) {
+      setState(INITIAL_STATE);
+      return;
+    }
+
+    const ctrl = new AbortController();
+    setState({ ...INITIAL_STATE, isStreaming: true });
+
+    const urlParams = new URLSearchParams({ query: params.query, accurate: "true" });
+    if (params.year) urlParams.set("year", params.year);
+    if (params.tags) urlParams.set("tags", params.tags);
+
+    fetch(`/api/documents/search/stream/?${urlParams.toString()}`, {
+      headers: {
+        Authorization: `Bearer ${localStorage.getItem("access_token")}`,
+      },
+      signal: ctrl.signal,
+    })
+      .then(async (res) => {
+        if (!res.ok) throw new Error(res.statusText);
+        const reader = res.body!.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+
+          buffer += decoder.decode(value, { stream: true });
+          const parts = buffer.split("\n\n");
+          buffer = parts.pop()!;
+
+          for (const part of parts) {
+            const eventMatch = part.match(/^event:\s*(\w+)/m);
+            const dataMatch = part.match(/^data:\s*(.*)$/m);
+            if (!eventMatch || !dataMatch) continue;
+
+            let data: any = {};
+            try {
+              data = JSON.parse(dataMatch[1]);
+            } catch (e) {
+              console.error(`Failed to parse ${eventMatch[1]} data:`, dataMatch[1], e);
+              continue;
+            }
+
+            switch (eventMatch[1]) {
+              case "sources":
+                setState((prev) => ({ ...prev, sources: data.sources ?? [] }));
+                break;
+              case "token":
+                setState((prev) => ({ ...prev, summary: prev.summary + data.content }));
+                break;
+              case "summary":
+                setState((prev) => ({ ...prev, summary: data.summary ?? prev.summary }));
+                break;
+              case "error":
+                setState((prev) => ({ ...prev, error: data.error || "Search failed" }));
+                break;
+              case "done":
+                setState((prev) => ({ ...prev, queryTime: data.query_time }));
+                break;
+            }
+          }
+        }
+
+        setState((prev) => ({ ...prev, sources: prev.sources ?? [], isStreaming: false }));
+      })
+      .catch((err) => {
+        if (err.name !== "AbortError") {
+          setState((prev) => ({ ...prev, error: err.message, isStreaming: false }));
+        }
+      });
+
+    return () => ctrl.abort();
+  }, [params?.query, params?.year, params?.tags]);
+
+  return state;
+}
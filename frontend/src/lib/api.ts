@@ -8,6 +8,7 @@ import {
 } from "@/types";
 import { SearchParams, SearchResults } from "@/types/search";
 import { Tag } from "@/types/tags";
+import { Source } from "@/types/message";
 import axios from "axios";
 
 const API_PREFIX = "/api";
@@ -161,10 +162,12 @@ export const chatsApi = {
       });
   },
 
-  getHistory: (chatId: number) => {
-    console.log(`Fetching chat history from LangGraph for chat ID: ${chatId}`);
+  getHistory: (chatId: number, before?: number) => {
+    console.log(`Fetching chat history for chat ID: ${chatId}`);
     return api
-      .get(`/chats/${chatId}/history`)
+      .get(`/chats/${chatId}/history`, {
+        params: before !== undefined ? { before } : undefined,
+      })
       .then((response) => response)
       .catch((error) => {
         console.error(`Error fetching chat history for ${chatId}:`, error);
@@ -174,6 +177,11 @@ export const chatsApi = {
 
   getMessages: (chatId: number) => api.get(`/chats/${chatId}/messages`),
 
+  getMessageSources: (chatId: number, messageId: string) =>
+    api.get<{ sources: Source[] }>(
+      `/chats/${chatId}/messages/${messageId}/sources/`
+    ),
+
   create: (data: { title: string; document_id?: number }) =>
     api.post<Chat>("/chats/create", data),
 
@@ -281,7 +289,7 @@ export const documentsApi = {
   search: (params: SearchParams) =>
     api
       .get<SearchResults>(
-        params.accurate ? "/documents/search" : "/documents/standard-search",
+        params.accurate ? "/documents/async/search" : "/documents/standard-search",
         { params }
       )
       .then((res) => res.data),
@@ -24,6 +24,9 @@ export default function ChatPage() {
   const [selectedModel, setSelectedModel] = useState<LLMModel | null>(null);
   const [text, setText] = useState("");
   const [isLoadingHistory, setIsLoadingHistory] = useState<boolean>(false);
+  // Sequence of the oldest loaded message while older pages remain
+  const [historyCursor, setHistoryCursor] = useState<number | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState<boolean>(false);
   const [uploadingFiles, setUploadingFiles] = useState<File[]>([]);
   const [uploadProgress, setUploadProgress] = useState(0);
   const [uploadedFiles, setUploadedFiles] = useState<
@@ -37,6 +40,7 @@ export default function ChatPage() {
   const {
     sendMessage,
     isStreaming,
+    isGeneratingTitle,
     messages,
     dispatch,
     newChatId,
@@ -78,6 +82,7 @@ export default function ChatPage() {
   const getChatHistory = useCallback((id: string) => {
     setIsLoadingHistory(true);
     setNewChatId(null);
+    setHistoryCursor(null);
 
     return chatsApi
       .getHistory(Number(id))
@@ -86,6 +91,7 @@ export default function ChatPage() {
           type: "SET_MESSAGES",
           payload: response.data.messages as Message[],
         });
+        setHistoryCursor(response.data.next_cursor ?? null);
       })
       .catch((err) => {
         console.error("Failed to load chat history:", err);
@@ -117,6 +123,32 @@ export default function ChatPage() {
     }
   }, [llmModels]);
 
+  const loadOlderMessages = () => {
+    if (!chatId || historyCursor === null) return;
+    setIsLoadingOlder(true);
+
+    chatsApi
+      .getHistory(Number(chatId), historyCursor)
+      .then((response) => {
+        dispatch({
+          type: "SET_MESSAGES",
+          payload: [...(response.data.messages as Message[]), ...messages],
+        });
+        setHistoryCursor(response.data.next_cursor ?? null);
+      })
+      .catch((err) => {
+        console.error("Failed to load older messages:", err);
+        toast({
+          title: "Error",
+          description: "Could not load older messages.",
+          variant: "destructive",
+        });
+      })
+      .finally(() => {
+        setIsLoadingOlder(false);
+      });
+  };
+
   const handleRegenerateMessage = (messageId: string) => { };
 
   useEffect(() => {
@@ -129,6 +161,7 @@ export default function ChatPage() {
       type: "SET_MESSAGES",
       payload: [] as Message[],
     });
+    setHistoryCursor(null);
 
     if (chatId) {
       getChatHistory(chatId);
@@ -305,9 +338,23 @@ export default function ChatPage() {
           </div>
         ) : (
           <div className="flex-1 overflow-y-auto">
+            {historyCursor !== null && (
+              <div className="flex justify-center pt-4">
+                <button
+                  type="button"
+                  onClick={loadOlderMessages}
+                  disabled={isLoadingOlder}
+                  className="flex items-center gap-2 text-sm text-gray-500 hover:text-gray-800 disabled:opacity-50"
+                >
+                  {isLoadingOlder && <Loader2 className="w-4 h-4 animate-spin" />}
+                  Load earlier messages
+                </button>
+              </div>
+            )}
             <ChatList
               messages={messages}
               isStreaming={isStreaming}
+              isGeneratingTitle={isGeneratingTitle}
               onRegenerateMessage={handleRegenerateMessage}
               onSelectSuggestion={handleSelectSuggestion}
             />
@@ -15,8 +15,10 @@ import { Popover, PopoverContent, PopoverTrigger } from "@/components/ui/popover
 import { Skeleton } from "@/components/ui/skeleton";
 import { Switch } from "@/components/ui/switch";
 import { Tooltip, TooltipContent, TooltipProvider, TooltipTrigger } from "@/components/ui/tooltip";
+import { useSearchStream } from "@/hooks/use-search-stream";
 import { documentsApi, tagsApi } from "@/lib/api";
 import { cn } from "@/lib/utils";
+import { SearchResults } from "@/types/search";
 import { useQuery } from "@tanstack/react-query";
 import { Calendar, Clock, FileText, Filter, Info, Search as SearchIcon, Sparkles, Tag, X } from "lucide-react";
 import { useEffect, useState } from "react";
@@ -74,17 +76,38 @@ export function SearchPage() {
     }
   }, [location.search]);
 
-  const { data: results, isLoading } = useQuery({
+  const { data: standardResults, isLoading: isStandardLoading } = useQuery({
     queryKey: ["search", searchParams],
     queryFn: () => documentsApi.search({
       query: searchParams!.query,
-      accurate: searchParams!.accurate,
+      accurate: false,
       year: searchParams?.year?.join(','),
       tags: searchParams?.tags?.join(','),
     }),
-    enabled: !!searchParams?.query,
+    enabled: !!searchParams?.query && !searchParams.accurate,
   });
 
+  // AI-powered results stream in: sources first, then the summary
+  const stream = useSearchStream(
+    searchParams?.query && searchParams.accurate
+      ? {
+          query: searchParams.query,
+          year: searchParams.year?.join(','),
+          tags: searchParams.tags?.join(','),
+        }
+      : null
+  );
+
+  const results: SearchResults | undefined = searchParams?.accurate
+    ? stream.sources !== null
+      ? { summary: stream.summary, sources: stream.sources, query_time: stream.queryTime }
+      : undefined
+    : standardResults;
+  const isLoading = searchParams?.accurate
+    ? stream.isStreaming && stream.sources === null
+    : isStandardLoading;
+  const isSummarizing = !!searchParams?.accurate && stream.isStreaming;
+
   // Count active filters
   const activeFilterCount = (
     (filters.year && filters.year.length > 0 ? 1 : 0) +
@@ -383,11 +406,13 @@ export function SearchPage() {
       ) : (
         results && (
           <div className="space-y-8 transition-all">
-            {results.summary && (
+            {results.summary ? (
               <SearchSummary
                 summary={results.summary}
                 queryTime={results.query_time}
               />
+            ) : (
+              isSummarizing && <SearchSummarySkeleton />
             )}
 
             {results.sources && results.sources.length > 0 ? (
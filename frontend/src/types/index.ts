@@ -12,6 +12,17 @@ export interface StatusHistory {
   changed_at: string | null;
 }
 
+export interface SummarizationProgress {
+  phase: "map" | "reduce" | "metadata" | "done" | "failed" | null;
+  chunks_total: number;
+  chunks_done: number;
+  collapse_rounds: number;
+  metadata_steps_done: number;
+  elapsed_seconds: number | null;
+  seconds_since_update: number | null;
+  map_eta_seconds: number | null;
+}
+
 export interface Document {
   id: number;
   title: string;
@@ -31,6 +42,7 @@ export interface Document {
   updated_at: string;
   uploaded_by?: User;
   status_history?: StatusHistory[];
+  summarization_progress?: SummarizationProgress | null;
   preview_image?: string;
   blurhash?: string;
   file_path?: string;
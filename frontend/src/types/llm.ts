@@ -10,6 +10,7 @@ export interface LLMModel {
   description: string;
   logo: string;
   instruct: boolean;
+  context_tokens: number;
 }
 
 /**
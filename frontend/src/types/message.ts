@@ -14,7 +14,8 @@ export interface Source {
   file_type: string;
   created_at: string;
   updated_at: string;
-  contents: {
+  // Omitted in chat history until the sources are opened
+  contents?: {
     snippet: string;
     chunk_index: number;
   }[];
@@ -25,6 +26,7 @@ export interface Message {
   role: Role;
   content: string;
   timestamp: string;
+  sequence?: number;
   message_type: "message" | "tool_call";
   tool_call?: {
     name: string;
@@ -32,5 +34,6 @@ export interface Message {
   };
   tool_result?: {
     sources: Source[];
+    lazy?: boolean;
   };
 }
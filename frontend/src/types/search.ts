@@ -15,13 +15,15 @@ export interface SearchSource {
   contents: {
     snippet: string;
     chunk_index: number;
+    chunk_indices?: number[];
   }[];
 }
 
 export interface SearchResults {
   summary: string;
   sources: SearchSource[];
-  query_time: number;
+  query_time?: number;
+  cached?: boolean;
 }
 
 export interface SearchParams {